@@ -0,0 +1,608 @@
+#!/usr/bin/python
+import os
+import sys
+import shutil
+import hashlib
+import tempfile
+import subprocess
+import AST
+from TypeChecker import NodeVisitor
+from Resolver import Resolver
+from ProgramCache import DiskCache
+from CodeGenerator import PythonInterpreter, contains
+from Output import SkippingSink
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '__native__')
+
+# compiler is $CC or cc on the path; programs are compiled with CFLAGS, executables are cached per compiler version
+CC = os.environ.get('CC', 'cc')
+CFLAGS = ['-O2', '-w']
+
+# exit status of a compiled program stopping at a value it cannot represent like python (see RUNTIME)
+FALLBACK_STATUS = 3
+
+# exit statuses of a compiled program stopping where python raises, with the exception raised in its place
+DIVISION_STATUS = 4
+MODULO_STATUS = 5
+SHIFT_STATUS = 6
+errors = {DIVISION_STATUS: (ZeroDivisionError, 'division by zero'),
+          MODULO_STATUS: (ZeroDivisionError, 'integer modulo by zero'),
+          SHIFT_STATUS: (ValueError, 'negative shift count')}
+
+# kinds of values of the C translation: python's int (and bool, printed as True or False) as 64 bit integers,
+# float as double; strings exist only as constants printed by print instructions
+c_types = {'int': 'long long', 'bool': 'long long', 'float': 'double'}
+numeric = ('int', 'bool', 'float')
+comparisons = ('==', '!=', '<', '<=', '>', '>=')
+checked = {'+': 'add', '-': 'sub', '*': 'mul', '%': 'mod', '<<': 'shl', '>>': 'shr'}
+
+# functions of integer operations stop the program with FALLBACK_STATUS where python's result does not fit
+# in 64 bits, so the program is run in python instead, and with one of the error statuses where python raises
+# (division by zero, negative shift); exact() falls back for integers a double cannot hold, which python
+# compares with floats exactly.
+# print_float writes the shortest digits reading back as the same double, in the layout of python's repr
+RUNTIME = r'''#include <math.h>
+#include <stdio.h>
+#include <stdlib.h>
+
+static void stop(int status) __attribute__((noreturn));
+static void stop(int status) { exit(status); }
+static void fallback(void) __attribute__((noreturn));
+static void fallback(void) { stop(%(status)d); }
+
+static long long add(long long a, long long b) { long long r; if (__builtin_add_overflow(a, b, &r)) fallback(); return r; }
+static long long sub(long long a, long long b) { long long r; if (__builtin_sub_overflow(a, b, &r)) fallback(); return r; }
+static long long mul(long long a, long long b) { long long r; if (__builtin_mul_overflow(a, b, &r)) fallback(); return r; }
+
+static long long mod(long long a, long long b)
+{
+    long long r;
+    if (b == 0) stop(%(modulo)d);
+    if (b == -1) return 0;
+    r = a %% b;
+    return r && (r ^ b) < 0 ? r + b : r;
+}
+
+static long long shl(long long a, long long b)
+{
+    if (b < 0) stop(%(shift)d);
+    if (a == 0) return 0;
+    if (b >= 63) fallback();
+    return mul(a, 1LL << b);
+}
+
+static long long shr(long long a, long long b)
+{
+    if (b < 0) stop(%(shift)d);
+    return a >> (b > 63 ? 63 : b);
+}
+
+static double exact(long long a)
+{
+    if (a > (1LL << 53) || a < -(1LL << 53)) fallback();
+    return (double)a;
+}
+
+static double divide(double a, double b) { if (b == 0.0) stop(%(division)d); return a / b; }
+static double divide_int(long long a, long long b) { if (b == 0) stop(%(division)d); return exact(a) / exact(b); }
+
+static void print_int(long long a) { printf("%%lld\n", a); }
+static void print_bool(long long a) { fputs(a ? "True\n" : "False\n", stdout); }
+
+static void print_float(double x)
+{
+    char text[32], digits[20];
+    int precision, count = 0, point, i;
+    const char *p = text;
+    if (isnan(x)) { fputs("nan\n", stdout); return; }
+    if (isinf(x)) { fputs(x > 0 ? "inf\n" : "-inf\n", stdout); return; }
+    for (precision = 1; precision < 17; precision++) {
+        snprintf(text, sizeof text, "%%.*e", precision - 1, x);
+        if (strtod(text, NULL) == x)
+            break;
+    }
+    if (precision == 17)
+        snprintf(text, sizeof text, "%%.16e", x);
+    if (*p == '-')
+        putchar(*p++);
+    for (; *p != 'e'; p++)
+        if (*p != '.')
+            digits[count++] = *p;
+    while (count > 1 && digits[count - 1] == '0')
+        count--;
+    point = atoi(p + 1) + 1;
+    if (point > -4 && point <= 16) {
+        if (point <= 0) {
+            fputs("0.", stdout);
+            for (i = point; i < 0; i++)
+                putchar('0');
+            fwrite(digits, 1, count, stdout);
+        } else if (point >= count) {
+            fwrite(digits, 1, count, stdout);
+            for (i = count; i < point; i++)
+                putchar('0');
+            fputs(".0", stdout);
+        } else {
+            fwrite(digits, 1, point, stdout);
+            putchar('.');
+            fwrite(digits + point, 1, count - point, stdout);
+        }
+    } else {
+        putchar(digits[0]);
+        if (count > 1) {
+            putchar('.');
+            fwrite(digits + 1, 1, count - 1, stdout);
+        }
+        printf("e%%+03d", point - 1);
+    }
+    putchar('\n');
+}
+''' % {'status': FALLBACK_STATUS, 'division': DIVISION_STATUS, 'modulo': MODULO_STATUS, 'shift': SHIFT_STATUS}
+
+
+class Unsupported(Exception):
+    # program uses a construct or a value the C translation has no equivalent for
+    pass
+
+
+def result_kind(op, left, right):  # kind of result of <op> on operands of kinds <left> and <right>
+    if left not in numeric or right not in numeric:
+        raise Unsupported("'{0}' on {1} and {2}".format(op, left, right))
+    floats = left == 'float' or right == 'float'
+    if op in ('+', '-', '*'):
+        return 'float' if floats else 'int'
+    if op == '/':
+        return 'float'
+    if op in comparisons:
+        return 'bool'
+    if floats or op not in ('%', '<<', '>>', '&', '|', '^'):
+        raise Unsupported("'{0}' on {1} and {2}".format(op, left, right))
+    if op in ('&', '|', '^') and left == right == 'bool':
+        return 'bool'
+    return 'int'
+
+
+def c_string(text):  # C string literal of python string <text>
+    return '"' + ''.join(chr(byte) if 32 <= byte < 127 and chr(byte) not in '\\"?' else '\\{0:03o}'.format(byte)
+                         for byte in text.encode()) + '"'
+
+
+class KindInference(NodeVisitor):
+    # kinds of values of every variable, function argument and function result, as python computes them (a
+    # variable declared int holds a float after an assignment of a quotient). Visits of expressions return their
+    # kind, None while not known yet; the program is visited until nothing changes, a variable or a function
+    # result with values of two kinds (or a string) makes the program Unsupported
+    def __init__(self):
+        self.variables = {}  # ('g', slot) of globals, (function name, slot) of locals -> kind
+        self.returns = {}    # function name -> kind of its results
+        self.function = None
+
+    def visit_Program(self, node):
+        self.changed = True
+        while self.changed:
+            self.changed = False
+            self.defined = set()
+            for child in node.children:
+                self.visit(child)
+        return self
+
+    def key(self, slot):  # key of variables of variable at resolved <slot> in the current function
+        if slot is None:
+            raise Unsupported('undefined variable')
+        if self.function is None or slot[0]:
+            return 'g', slot[1]
+        return self.function.id, slot[1]
+
+    def assign(self, table, key, kind):
+        if kind is None:
+            return
+        if kind not in numeric:
+            raise Unsupported('{0} value stored'.format(kind))
+        old = table.get(key)
+        if old is None:
+            table[key] = kind
+            self.changed = True
+        elif old != kind:
+            raise Unsupported('{0} and {1} values stored in the same place'.format(old, kind))
+
+    def visit_Fundef(self, node):
+        if node.id in self.defined:
+            raise Unsupported("redefinition of function '{0}'".format(node.id))
+        self.defined.add(node.id)
+        self.function = node
+        self.visit(node.instr)
+        self.function = None
+
+    def visit_CompoundInstr(self, node):
+        for child in node.declarations.list + node.instructions.list:
+            self.visit(child)
+
+    def visit_Declaration(self, node):
+        for init in node.value.list:
+            self.visit(init)
+
+    def visit_Init(self, node):
+        self.assign(self.variables, self.key((0, node.slot[1])), self.visit(node.expr))
+
+    def visit_Assignment(self, node):
+        self.assign(self.variables, self.key(node.slot), self.visit(node.expression))
+
+    def visit_ChoiceInstr(self, node):
+        self.visit(node.condition.expression)
+        self.visit(node.instruction)
+        if node.instruction_else is not None:
+            self.visit(node.instruction_else)
+
+    def visit_WhileInstr(self, node):
+        self.visit(node.condition.expression)
+        self.visit(node.instruction)
+
+    def visit_RepeatInstr(self, node):
+        for instruction in node.instructions.list:
+            self.visit(instruction)
+        self.visit(node.condition.expression)
+
+    def visit_ReturnInstr(self, node):
+        kind = self.visit(node.expression)
+        if self.function is not None:
+            self.assign(self.returns, self.function.id, kind)
+
+    def visit_BinExpr(self, node):
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        return None if left is None or right is None else result_kind(node.op, left, right)
+
+    def visit_Integer(self, node):
+        if not -2 ** 63 < int(node.value) < 2 ** 63:
+            raise Unsupported('integer constant beyond 64 bits')
+        return 'int'
+
+    def visit_Float(self, node):
+        return 'float'
+
+    def visit_String(self, node):
+        return 'string'
+
+    def visit_Variable(self, node):
+        return self.variables.get(self.key(node.slot))
+
+    def visit_Funcall(self, node):
+        for position, arg in enumerate(node.args.list):
+            self.assign(self.variables, (node.id, position), self.visit(arg))
+        return self.returns.get(node.id)
+
+
+class CCodeGenerator(NodeVisitor):
+    # translates a type checked program into a C translation unit, for the subset of programs whose values are
+    # all of a single kind per variable (KindInference). Variables become C variables named by their Resolver
+    # slots: globals g<slot>, locals v<slot>; functions f_<name>, only those called with values; top level code is
+    # main(). Operands are evaluated left to right as in python: expressions with calls store every operand in a
+    # temporary t<n> first. Functions ending without return stop the program (python would return None), as
+    # does every operation with a result differing from python's (RUNTIME), so any program prints either what
+    # the interpreter prints or nothing at all.
+
+    def visit_Program(self, node):  # returns C source
+        if not hasattr(node, 'frame_size'):
+            node.accept(Resolver())
+        self.kinds = KindInference().visit(node)
+        self.temps = 0
+        self.labels = 0
+        self.function = None
+        self.return_label = None
+        lines = [RUNTIME]
+        lines += ['static {0} g{1};'.format(c_types[kind], key[1])
+                  for key, kind in sorted(self.kinds.variables.items()) if key[0] == 'g']
+        functions = [child.code for child in node.children
+                     if isinstance(child.code, AST.Fundef) and self.known(child.code)]
+        lines += [self.prototype(function) + ';' for function in functions]
+        for function in functions:
+            lines += self.define(function)
+        self.lines = ['int main(void)', '{']
+        self.indent = 1
+        for child in node.children:
+            self.visit(child)
+        self.line('return 0;')
+        lines += self.lines + ['}']
+        return '\n'.join(lines) + '\n'
+
+    def line(self, text):
+        self.lines.append('    ' * self.indent + text)
+
+    def kind(self, table, key):
+        kind = table.get(key)
+        if kind is None:
+            raise Unsupported('value of unknown kind')
+        return kind
+
+    def known(self, node):  # whether kinds of arguments and result of function <node> are known (it is called)
+        return node.id in self.kinds.returns and all((node.id, position) in self.kinds.variables
+                                                     for position in range(len(node.args.list)))
+
+    def prototype(self, node):
+        args = ['{0} v{1}'.format(c_types[self.kind(self.kinds.variables, (node.id, position))], position)
+                for position in range(len(node.args.list))]
+        return 'static {0} f_{1}({2})'.format(c_types[self.kind(self.kinds.returns, node.id)], node.id,
+                                             ', '.join(args) or 'void')
+
+    def define(self, node):  # lines of C function of Fundef <node>
+        self.function = node
+        self.lines = [self.prototype(node), '{']
+        self.indent = 1
+        for key, kind in sorted(self.kinds.variables.items()):
+            if key[0] == node.id and key[1] >= len(node.args.list):
+                self.line('{0} v{1} = 0;'.format(c_types[kind], key[1]))
+        self.visit(node.instr)
+        self.line('fallback();')
+        self.function = None
+        return self.lines + ['}']
+
+    def variable(self, slot):  # (C name, kind) of variable at resolved <slot>
+        if slot is None:
+            raise Unsupported('undefined variable')
+        if self.function is None or slot[0]:
+            return 'g{0}'.format(slot[1]), self.kind(self.kinds.variables, ('g', slot[1]))
+        return 'v{0}'.format(slot[1]), self.kind(self.kinds.variables, (self.function.id, slot[1]))
+
+    def block(self, nodes):  # braced C block of statements <nodes>, opened on the last line
+        self.indent += 1
+        for node in nodes:
+            self.visit(node)
+        self.indent -= 1
+        self.line('}')
+
+    def visit_Construction(self, node):
+        if isinstance(node.code, AST.Fundef):
+            return
+        if contains(node.code, AST.ReturnInstr):
+            self.return_label = 'end{0}'.format(self.labels)
+            self.labels += 1
+            self.visit(node.code)
+            self.line(self.return_label + ': ;')
+            self.return_label = None
+        else:
+            self.visit(node.code)
+
+    def visit_CompoundInstr(self, node):
+        for child in node.declarations.list + node.instructions.list:
+            self.visit(child)
+
+    def visit_Declaration(self, node):
+        for init in node.value.list:
+            self.visit(init)
+
+    def visit_Init(self, node):
+        self.line('{0} = {1};'.format(self.variable((0, node.slot[1]))[0], self.expression(node.expr)[0]))
+
+    def visit_Instruction(self, node):
+        if isinstance(node.instruction, (AST.BinExpr, AST.Const, AST.Variable, AST.Funcall)):
+            self.line('(void)({0});'.format(self.expression(node.instruction)[0]))
+        else:
+            self.visit(node.instruction)
+
+    def visit_LabeledInstr(self, node):
+        self.visit(node.instruction)
+
+    def visit_Assignment(self, node):
+        name = self.variable(node.slot)[0]
+        self.line('{0} = {1};'.format(name, self.expression(node.expression)[0]))
+
+    def visit_PrintInstr(self, node):
+        if isinstance(node.expression, AST.String):
+            self.line('fputs({0}, stdout);'.format(c_string(node.expression.value[1:-1] + '\n')))
+        else:
+            code, kind = self.expression(node.expression)
+            self.line('print_{0}({1});'.format(kind, code))
+
+    def visit_ChoiceInstr(self, node):
+        self.line('if ({0}) {{'.format(self.expression(node.condition.expression)[0]))
+        self.block([node.instruction])
+        if node.instruction_else is not None:
+            self.lines[-1] += ' else {'
+            self.block([node.instruction_else])
+
+    def visit_WhileInstr(self, node):
+        condition = node.condition.expression
+        if contains(condition, AST.Funcall):
+            self.line('for (;;) {')
+            self.indent += 1
+            self.line('if (!({0})) break;'.format(self.expression(condition)[0]))
+            self.indent -= 1
+        else:
+            self.line('while ({0}) {{'.format(self.expression(condition)[0]))
+        self.block([node.instruction])
+
+    def visit_RepeatInstr(self, node):
+        condition = node.condition.expression
+        if contains(condition, AST.Funcall):
+            # first iteration flag: continue goes to the condition as in do ... while
+            flag = 'r{0}'.format(self.labels)
+            self.labels += 1
+            self.line('for (int {0} = 1;; {0} = 0) {{'.format(flag))
+            self.indent += 1
+            self.line('if (!{0}) {{'.format(flag))
+            self.indent += 1
+            self.line('if ({0}) break;'.format(self.expression(condition)[0]))
+            self.indent -= 1
+            self.line('}')
+            self.indent -= 1
+            self.block(node.instructions.list)
+        else:
+            self.line('do {')
+            self.block(node.instructions.list)
+            self.lines[-1] += ' while (!({0}));'.format(self.expression(condition)[0])
+
+    def visit_ReturnInstr(self, node):
+        code = self.expression(node.expression)[0]
+        if self.function is None:  # ends the top level construction
+            self.line('(void)({0});'.format(code))
+            self.line('goto {0};'.format(self.return_label))
+        else:
+            self.line('return {0};'.format(code))
+
+    def visit_BreakInstr(self, node):
+        self.line('break;')
+
+    def visit_ContinueInstr(self, node):
+        self.line('continue;')
+
+    def expression(self, node):  # (C code, kind) of expression <node>, temporaries are declared before it
+        self.ordered = contains(node, AST.Funcall)
+        return self.value(node)
+
+    def value(self, node):
+        code, kind = self.visit(node)
+        if self.ordered and not isinstance(node, AST.Const):
+            name = 't{0}'.format(self.temps)
+            self.temps += 1
+            self.line('{0} {1} = {2};'.format(c_types[kind], name, code))
+            code = name
+        return code, kind
+
+    def visit_BinExpr(self, node):
+        left, left_kind = self.value(node.left)
+        right, right_kind = self.value(node.right)
+        op = node.op
+        kind = result_kind(op, left_kind, right_kind)
+        if op == '/':
+            if left_kind != 'float' and right_kind != 'float':
+                return 'divide_int({0}, {1})'.format(left, right), kind
+            return 'divide({0}, {1})'.format(self.to_float(left, left_kind), self.to_float(right, right_kind)), kind
+        if kind == 'float':
+            return '({0} {1} {2})'.format(self.to_float(left, left_kind), op, self.to_float(right, right_kind)), kind
+        if op in comparisons and (left_kind == 'float') != (right_kind == 'float'):
+            left, right = [code if kind == 'float' else 'exact({0})'.format(code)
+                           for code, kind in ((left, left_kind), (right, right_kind))]
+        if op in checked:
+            return '{0}({1}, {2})'.format(checked[op], left, right), kind
+        return '({0} {1} {2})'.format(left, op, right), kind
+
+    def to_float(self, code, kind):
+        return code if kind == 'float' else '(double){0}'.format(code)
+
+    def visit_Integer(self, node):
+        return '{0}LL'.format(int(node.value)), 'int'
+
+    def visit_Float(self, node):
+        value = float(node.value)
+        if value != value:
+            return 'NAN', 'float'
+        if value in (float('inf'), float('-inf')):
+            return ('INFINITY' if value > 0 else '-INFINITY'), 'float'
+        return value.hex(), 'float'
+
+    def visit_String(self, node):
+        raise Unsupported('string in an expression')
+
+    def visit_Variable(self, node):
+        return self.variable(node.slot)
+
+    def visit_Funcall(self, node):
+        args = [self.value(arg)[0] for arg in node.args.list]
+        return 'f_{0}({1})'.format(node.id, ', '.join(args)), self.kind(self.kinds.returns, node.id)
+
+
+def compiler_version():  # identification of the C compiler, None if there is none
+    try:
+        result = subprocess.run([CC, '--version'], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    except OSError:
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+def build(source, executable):  # compiles C <source> into file <executable>, whether it succeeded
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'program.c')
+        with open(path, 'w') as file:
+            file.write(source)
+        output = os.path.join(directory, 'program')
+        try:
+            result = subprocess.run([CC] + CFLAGS + ['-o', output, path, '-lm'],
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except OSError:
+            return False
+        if result.returncode != 0:
+            return False
+        shutil.move(output, executable)
+        return True
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+class NativeCache(DiskCache):
+    # on-disk cache of executables compiled from generated C source, keyed on the source, with the compiler
+    # identification and its flags as version
+    name = 'native cache'
+    suffix = '.bin'
+
+    def __init__(self, cache_dir=None, **kwargs):
+        version = compiler_version()
+        super().__init__(None if version is None else
+                         hashlib.sha1(version + ' '.join([CC] + CFLAGS).encode()).hexdigest()[:16],
+                         cache_dir or CACHE_DIR, **kwargs)
+
+    def compile(self, source):  # path of executable of C <source>, None if it cannot be compiled
+        if self.version is None:
+            return None
+        path = self.read(source, lambda path: path if os.path.exists(path) else None)
+        if path is None:
+            path = self.write(source, lambda tmp: build(source, tmp))
+        return path
+
+
+class NativeInterpreter(object):
+    # drop-in alternative for Interpreter: ast.accept(NativeInterpreter()) translates the program to C with
+    # CCodeGenerator, compiles it with the system C compiler and runs the executable, passing its output on line
+    # by line as it is printed. Programs which cannot be translated or compiled are run by <fallback> instead;
+    # so is the rest of a program stopping at a value C cannot represent, which only shows while it runs: it is
+    # run again from the start with the lines it already printed dropped. Where python raises, the executable
+    # stops and the same exception is raised. fallback holds the reason (None when the program ran natively)
+
+    def __init__(self, output=None, cache=None, fallback=PythonInterpreter):
+        # output - sink of printed values (Output.py), None - sys.stdout; cache - NativeCache, None - compile
+        # every time; fallback - backend class called with the sink to print to, running programs which do not
+        # run natively
+        self.output = output
+        self.cache = cache
+        self.interpreter = fallback
+        self.fallback = None
+
+    def visit(self, node):
+        try:
+            source = node.accept(CCodeGenerator())
+        except (Unsupported, RecursionError) as error:
+            return self.run_fallback(node, str(error) or 'expressions nested too deeply')
+        if self.cache is not None:
+            return self.run(node, self.cache.compile(source))
+        directory = tempfile.mkdtemp()
+        try:
+            executable = os.path.join(directory, 'program')
+            return self.run(node, executable if build(source, executable) else None)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def run(self, node, executable):
+        if executable is None:
+            return self.run_fallback(node, 'program could not be compiled')
+        printed = 0
+        with subprocess.Popen([executable], stdout=subprocess.PIPE) as process:
+            for line in process.stdout:
+                text = line.decode('utf-8', 'surrogateescape')
+                if self.output is None:
+                    sys.stdout.write(text)
+                else:
+                    self.output.print(text.rstrip('\n'))
+                printed += 1
+        if self.output is not None:
+            self.output.flush()
+        if process.returncode == FALLBACK_STATUS:
+            return self.run_fallback(node, 'value beyond 64 bits after {0} lines'.format(printed), printed)
+        if process.returncode in errors:
+            error, message = errors[process.returncode]
+            raise error(message)
+        if process.returncode != 0:
+            raise RuntimeError('program stopped with status {0}'.format(process.returncode))
+
+    def run_fallback(self, node, reason, printed=0):
+        self.fallback = reason
+        return node.accept(self.interpreter(SkippingSink(self.output, printed) if printed else self.output))
@@ -0,0 +1,271 @@
+#!/usr/bin/python
+import AST
+from TypeChecker import NodeVisitor
+from Interpreter import Interpreter
+from Resolver import Resolver
+from Exceptions import BREAK, CONTINUE, TailCall
+
+
+class Function(object):
+    def __init__(self, name, nargs, nlocals):
+        self.name = name
+        self.nargs = nargs
+        self.nlocals = nlocals
+        self.body = None
+
+
+def _nothing(frame):
+    return None
+
+
+class ClosureCompiler(NodeVisitor):
+    # walks type checked AST once and turns every node into a python closure taking the current frame,
+    # expressions return their value and statements their completion signal (see Exceptions.py)
+
+    def __init__(self, output=None):  # output - sink of printed values (Output.py), None - builtin print
+        self.emit = print if output is None else output.print
+
+    def visit_Program(self, node):
+        if not hasattr(node, 'frame_size'):
+            node.accept(Resolver())
+        self.globals = []
+        self.functions = {}
+        statements = [self.visit(child) for child in node.children]
+        globals_ = self.globals
+        nglobals = node.frame_size
+
+        def program():
+            globals_[:] = [None] * nglobals
+            frame = globals_
+            for statement in statements:
+                statement(frame)
+
+        return program
+
+    def block(self, nodes):
+        statements = tuple(self.visit(child) for child in nodes)
+        if len(statements) == 1:
+            return statements[0]
+
+        def block(frame):
+            for statement in statements:
+                signal = statement(frame)
+                if signal is not None:
+                    return signal
+
+        return block
+
+    # constructions and instructions
+
+    def visit_Construction(self, node):
+        return self.visit(node.code)
+
+    def visit_Instruction(self, node):
+        if isinstance(node.instruction, (AST.BinExpr, AST.Const, AST.Variable, AST.Funcall)):
+            expression = self.visit(node.instruction)
+
+            def expression_instr(frame):
+                expression(frame)
+
+            return expression_instr
+        return self.visit(node.instruction)
+
+    def visit_LabeledInstr(self, node):
+        return self.visit(node.instruction)
+
+    def visit_InstructionList(self, node):
+        return self.block(node.list)
+
+    def visit_DeclarationList(self, node):
+        return self.block(node.list)
+
+    def visit_Declaration(self, node):
+        return self.block(node.value.list)
+
+    def visit_Init(self, node):
+        return self.store(node.slot, self.visit(node.expr))
+
+    def visit_Assignment(self, node):
+        return self.store(node.slot, self.visit(node.expression))
+
+    def store(self, var, expr):
+        if var is None:
+            def assignment(frame):
+                expr(frame)
+
+            return assignment
+        depth, slot = var
+        if depth:
+            globals_ = self.globals
+
+            def store_global(frame):
+                globals_[slot] = expr(frame)
+
+            return store_global
+
+        def store_local(frame):
+            frame[slot] = expr(frame)
+
+        return store_local
+
+    def visit_PrintInstr(self, node):
+        if not isinstance(node.expression, AST.Node):
+            return _nothing
+        expr = self.visit(node.expression)
+
+        emit = self.emit
+
+        def print_instr(frame):
+            emit(expr(frame))
+
+        return print_instr
+
+    def visit_CompoundInstr(self, node, fundef=False):
+        return self.block(node.declarations.list + node.instructions.list)
+
+    def visit_ChoiceInstr(self, node):
+        condition = self.visit(node.condition)
+        instruction = self.visit(node.instruction)
+        if node.instruction_else is None:
+            def choice_instr(frame):
+                if condition(frame):
+                    return instruction(frame)
+
+            return choice_instr
+        instruction_else = self.visit(node.instruction_else)
+
+        def choice_else_instr(frame):
+            if condition(frame):
+                return instruction(frame)
+            return instruction_else(frame)
+
+        return choice_else_instr
+
+    def visit_WhileInstr(self, node):
+        condition = self.visit(node.condition)
+        instruction = self.visit(node.instruction)
+
+        def while_instr(frame):
+            while condition(frame):
+                signal = instruction(frame)
+                if signal is not None:
+                    if signal is BREAK:
+                        break
+                    if signal is not CONTINUE:
+                        return signal
+
+        return while_instr
+
+    def visit_RepeatInstr(self, node):
+        instructions = self.visit(node.instructions)
+        condition = self.visit(node.condition)
+
+        def repeat_instr(frame):
+            while True:
+                signal = instructions(frame)
+                if signal is not None:
+                    if signal is BREAK:
+                        break
+                    if signal is not CONTINUE:
+                        return signal
+                if condition(frame):
+                    break
+
+        return repeat_instr
+
+    def visit_BreakInstr(self, node):
+        return lambda frame: BREAK
+
+    def visit_ContinueInstr(self, node):
+        return lambda frame: CONTINUE
+
+    def visit_ReturnInstr(self, node):
+        if node.tail:  # return f(...) inside f, the call is made by the loop in funcall
+            call = node.expression
+            args = tuple(self.visit(arg) for arg in call.args.list)
+
+            def tail_return(frame):
+                return TailCall(call, [arg(frame) for arg in args])
+
+            return tail_return
+
+        expr = self.visit(node.expression)
+
+        def return_instr(frame):
+            return (expr(frame),)
+
+        return return_instr
+
+    def visit_Condition(self, node):
+        return self.visit(node.expression)
+
+    def visit_Fundef(self, node):
+        function = Function(node.id, len(node.args.list), node.frame_size)
+        self.functions[node.id] = function
+        function.body = self.visit_CompoundInstr(node.instr, fundef=True)
+        return _nothing
+
+    # expressions
+
+    def visit_BinExpr(self, node):
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        op = Interpreter.op[node.op]
+
+        def bin_expr(frame):
+            return op(left(frame), right(frame))
+
+        return bin_expr
+
+    def constant(self, value):
+        return lambda frame: value
+
+    def visit_Integer(self, node):
+        return self.constant(int(node.value))
+
+    def visit_Float(self, node):
+        return self.constant(float(node.value))
+
+    def visit_String(self, node):
+        return self.constant(str(node.value[1:-1]))
+
+    def visit_Variable(self, node):
+        if node.slot is None:
+            return self.constant(None)
+        depth, slot = node.slot
+        if depth:
+            globals_ = self.globals
+            return lambda frame: globals_[slot]
+        return lambda frame: frame[slot]
+
+    def visit_Funcall(self, node):
+        function = self.functions[node.id]
+        args = tuple(self.visit(arg) for arg in node.args.list)
+
+        def funcall(frame):
+            new_frame = [arg(frame) for arg in args]
+            if function.nlocals > function.nargs:
+                new_frame.extend([None] * (function.nlocals - function.nargs))
+            signal = function.body(new_frame)
+            while signal.__class__ is TailCall:
+                new_frame[:function.nargs] = signal.args
+                signal = function.body(new_frame)
+            if signal is not None:
+                return signal[0]
+
+        return funcall
+
+
+class ClosureInterpreter(object):
+    # drop-in alternative for Interpreter: ast.accept(ClosureInterpreter()) compiles and runs the program
+
+    def __init__(self, output=None):  # output - sink of printed values (Output.py), None - builtin print
+        self.output = output
+
+    def visit(self, node):
+        program = ClosureCompiler(self.output).visit(node)
+        try:
+            program()
+        finally:
+            if self.output is not None:
+                self.output.flush()
@@ -0,0 +1,334 @@
+#!/usr/bin/python
+import os
+import sys
+import marshal
+import importlib.util
+import AST
+import scanner
+import Cparser
+import TypeChecker
+import SymbolTable
+import OptimizationPass1
+import OptimizationPass2
+from TypeChecker import NodeVisitor
+from Resolver import Resolver
+from Interpreter import Interpreter
+from StackInterpreter import StackInterpreter
+from ProgramCache import DiskCache, sources_hash
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '__code__')
+
+# python operator of every operator of the language with its python precedence; operands of lower precedence
+# (or equal, on the right side - operators are left associative) are parenthesized. Comparisons chain in python,
+# so a comparison never is a direct operand of another one. Other operators run through Interpreter.op.
+operators = {'*': 12, '/': 12, '%': 12, '+': 11, '-': 11, '<<': 10, '>>': 10, '&': 9, '^': 8, '|': 7,
+             '>': 6, '>=': 6, '<': 6, '<=': 6, '==': 6, '!=': 6}
+COMPARISON = 6
+ATOM = 20
+
+
+def literal(value):  # python source of constant <value> with its precedence
+    if isinstance(value, float) and (value != value or value in (float('inf'), float('-inf'))):
+        return "float('{0}')".format(value), ATOM
+    text = repr(value)
+    return text, ATOM if not text.startswith('-') else 0
+
+
+def contains(node, classes, stop=()):
+    # whether <node> contains a node of one of <classes>, without looking into nodes of classes <stop>
+    pending = [node]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, classes):
+            return True
+        if isinstance(node, AST.Node) and not isinstance(node, stop):
+            pending.extend(child for child in node.children if child is not None)
+            if isinstance(node, (AST.WhileInstr, AST.RepeatInstr, AST.ChoiceInstr)):
+                pending.append(node.condition)
+    return False
+
+
+loops = (AST.WhileInstr, AST.RepeatInstr)
+
+
+class CodeGenerator(NodeVisitor):
+    # translates a type checked program into python source of a module defining __program__(), which runs it.
+    # Variables become python variables named by their Resolver slots: globals g<slot> of the module, locals
+    # v<slot> of the function; functions become module level functions f_<name>, defined when their
+    # definition is reached as in the interpreter, and print instructions call emit(value).
+    # repeat ... until runs as a while loop guarded by a first iteration flag, so continue reaches the condition;
+    # a function returning a call to itself outside of loops restarts its body in a loop instead of recursing;
+    # top level constructions with return in them become functions, return ends only the construction.
+
+    def visit_Program(self, node):  # returns python source
+        if not hasattr(node, 'frame_size'):
+            node.accept(Resolver())
+        self.lines = []
+        self.indent = 0
+        self.flags = 0
+        self.function = None
+        self.names = ['g{0}'.format(slot) for slot in range(node.frame_size)]
+        self.names += sorted(set('f_' + child.code.id for child in node.children
+                                 if isinstance(child.code, AST.Fundef)))
+        self.line('def __program__():')
+        self.indent += 1
+        self.declare_globals()
+        for name in self.names:
+            if name.startswith('g'):
+                self.line('{0} = None'.format(name))
+        for child in node.children:
+            self.visit(child)
+        self.line('pass')
+        return '\n'.join(self.lines) + '\n'
+
+    def line(self, text):
+        self.lines.append('    ' * self.indent + text)
+
+    def declare_globals(self):
+        if self.names:
+            self.line('global ' + ', '.join(self.names))
+
+    def block(self, nodes):  # indented python block of statements <nodes>
+        self.indent += 1
+        count = len(self.lines)
+        for node in nodes:
+            self.visit(node)
+        if len(self.lines) == count:
+            self.line('pass')
+        self.indent -= 1
+
+    def variable(self, slot):  # python name of variable at resolved <slot>, None for unresolved ones
+        if slot is None:
+            return None
+        if self.function is None or slot[0]:
+            return 'g{0}'.format(slot[1])
+        return 'v{0}'.format(slot[1])
+
+    def visit_Construction(self, node):
+        if self.function is None and not isinstance(node.code, AST.Fundef) \
+                and contains(node.code, AST.ReturnInstr, AST.Fundef):
+            name = 'construction{0}'.format(len(self.lines))
+            self.line('def {0}():'.format(name))
+            self.indent += 1
+            self.declare_globals()
+            self.block([node.code])
+            self.indent -= 1
+            self.line('{0}()'.format(name))
+        else:
+            self.visit(node.code)
+
+    def visit_Fundef(self, node):
+        args = ['v{0}'.format(arg.slot[1]) for arg in node.args.list]
+        self.line('def f_{0}({1}):'.format(node.id, ', '.join(args)))
+        self.function = node
+        self.indent += 1
+        globals_ = [name for name in self.names if name.startswith('g')]
+        if globals_:
+            self.line('global ' + ', '.join(globals_))
+        local_names = ['v{0}'.format(slot) for slot in range(len(args), node.frame_size)]
+        if local_names:
+            self.line(' = '.join(local_names) + ' = None')
+        self.tail_loop = self.has_tail_loop(node.instr)
+        if self.tail_loop:
+            self.line('while True:')
+            self.indent += 1
+        self.block_body(node.instr)
+        if self.tail_loop:
+            self.line('return None')
+            self.indent -= 1
+        self.indent -= 1
+        self.function = None
+
+    def block_body(self, node):  # statements of compound instruction <node> at the current indentation
+        count = len(self.lines)
+        for child in node.declarations.list + node.instructions.list:
+            self.visit(child)
+        if len(self.lines) == count:
+            self.line('pass')
+
+    def has_tail_loop(self, node):  # whether function body <node> has tail calls outside of loops
+        pending = [node]
+        while pending:
+            node = pending.pop()
+            if isinstance(node, AST.ReturnInstr) and node.tail:
+                return True
+            if isinstance(node, AST.Node) and not isinstance(node, loops):
+                pending.extend(child for child in node.children if child is not None)
+        return False
+
+    def visit_CompoundInstr(self, node):
+        for child in node.declarations.list + node.instructions.list:
+            self.visit(child)
+
+    def visit_Declaration(self, node):
+        for init in node.value.list:
+            self.visit(init)
+
+    def visit_Init(self, node):
+        self.line('{0} = {1}'.format(self.variable((0, node.slot[1])), self.expression(node.expr)))
+
+    def visit_Instruction(self, node):
+        if isinstance(node.instruction, (AST.BinExpr, AST.Const, AST.Variable, AST.Funcall)):
+            self.line(self.expression(node.instruction))
+        else:
+            self.visit(node.instruction)
+
+    def visit_LabeledInstr(self, node):
+        self.visit(node.instruction)
+
+    def visit_Assignment(self, node):
+        name = self.variable(node.slot)
+        expression = self.expression(node.expression)
+        self.line(expression if name is None else '{0} = {1}'.format(name, expression))
+
+    def visit_PrintInstr(self, node):
+        self.line('emit({0})'.format(self.expression(node.expression)))
+
+    def visit_ChoiceInstr(self, node):
+        self.line('if {0}:'.format(self.expression(node.condition.expression)))
+        self.block([node.instruction])
+        if node.instruction_else is not None:
+            self.line('else:')
+            self.block([node.instruction_else])
+
+    def visit_WhileInstr(self, node):
+        self.line('while {0}:'.format(self.expression(node.condition.expression)))
+        self.block([node.instruction])
+
+    def visit_RepeatInstr(self, node):
+        flag = 'r{0}'.format(self.flags)
+        self.flags += 1
+        self.line('{0} = True'.format(flag))
+        self.line('while {0} or not {1}:'.format(flag, self.operand(node.condition.expression, COMPARISON)))
+        self.indent += 1
+        self.line('{0} = False'.format(flag))
+        self.indent -= 1
+        self.block(node.instructions.list)
+
+    def visit_ReturnInstr(self, node):
+        expression = node.expression
+        if self.function is None:  # ends the top level construction
+            self.line(self.expression(expression))
+            self.line('return')
+        elif node.tail and self.tail_loop and not self.in_loop(node):
+            args = [self.expression(arg) for arg in expression.args.list]
+            if args:
+                names = ['v{0}'.format(arg.slot[1]) for arg in self.function.args.list]
+                self.line('{0}, = {1},'.format(', '.join(names), ', '.join(args)))
+            self.line('continue')
+        else:
+            self.line('return {0}'.format(self.expression(expression)))
+
+    def in_loop(self, node):  # whether <node> is in a loop of the current function
+        return self.loop_depth(self.function.instr, node)
+
+    def loop_depth(self, root, target):
+        pending = [(root, False)]
+        while pending:
+            node, looped = pending.pop()
+            if node is target:
+                return looped
+            if isinstance(node, AST.Node):
+                looped = looped or isinstance(node, loops)
+                pending.extend((child, looped) for child in node.children if child is not None)
+        return False
+
+    def visit_BreakInstr(self, node):
+        self.line('break')
+
+    def visit_ContinueInstr(self, node):
+        self.line('continue')
+
+    def expression(self, node):  # python source of expression <node>
+        return self.operand(node, 0)
+
+    def operand(self, node, precedence):
+        # python source of expression <node>, parenthesized unless it binds tighter than <precedence>
+        text, own = self.visit(node)
+        return text if own > precedence else '(' + text + ')'
+
+    def visit_BinExpr(self, node):
+        precedence = operators.get(node.op)
+        if precedence is None:
+            return 'op[{0!r}]({1}, {2})'.format(node.op, self.expression(node.left), self.expression(node.right)), ATOM
+        left = self.operand(node.left, precedence - 1 if precedence != COMPARISON else COMPARISON)
+        right = self.operand(node.right, precedence)
+        return '{0} {1} {2}'.format(left, node.op, right), precedence
+
+    def visit_Integer(self, node):
+        return literal(int(node.value))
+
+    def visit_Float(self, node):
+        return literal(float(node.value))
+
+    def visit_String(self, node):
+        return literal(str(node.value[1:-1]))
+
+    def visit_Variable(self, node):
+        name = self.variable(node.slot)
+        return ('None' if name is None else name), ATOM
+
+    def visit_Funcall(self, node):
+        return 'f_{0}({1})'.format(node.id, ', '.join(self.expression(arg) for arg in node.args.list)), ATOM
+
+
+def load_code(path):
+    with open(path, 'rb') as file:
+        return marshal.load(file)
+
+
+class CodeCache(DiskCache):
+    # code objects compiled from programs, keyed on the program source text and on whether it was optimized, so
+    # a hit skips the front end and code generation; version covers the front end, Resolver, the optimization
+    # passes, CodeGenerator and python's bytecode (marshalled code is valid only for the version which wrote it).
+    # Entries are (code, messages printed while checking the program).
+    name = 'code cache'
+    suffix = '.code'
+
+    def __init__(self, cache_dir=None, **kwargs):
+        version = sources_hash((scanner, Cparser, TypeChecker, SymbolTable, AST, sys.modules[Resolver.__module__],
+                                OptimizationPass1, OptimizationPass2, sys.modules[__name__]),
+                               importlib.util.MAGIC_NUMBER.hex())
+        super().__init__(version, cache_dir or CACHE_DIR, **kwargs)
+
+    def key(self, text, optimized):
+        return ('-O\n' if optimized else '\n') + text
+
+    def load(self, text, optimized=False):  # (code, messages) cached for source <text>, None if there is none
+        return self.read(self.key(text, optimized), load_code)
+
+    def store(self, text, optimized, code, messages=''):
+        def dump(path):
+            with open(path, 'wb') as file:
+                marshal.dump((code, messages), file)
+        return self.write(self.key(text, optimized), dump) is not None
+
+
+class PythonInterpreter(object):
+    # drop-in alternative for Interpreter: ast.accept(PythonInterpreter()) translates the program to python with
+    # CodeGenerator and runs it with python's own interpreter. Programs python cannot compile (nesting deeper
+    # than its parser and compiler allow) are run by StackInterpreter instead.
+
+    def __init__(self, output=None, store=None):
+        # output - sink of printed values (Output.py), None - builtin print; store - function called with the
+        # compiled code object (to cache it), None - code is not kept
+        self.output = output
+        self.store = store
+
+    def visit(self, node):
+        try:
+            code = compile(node.accept(CodeGenerator()), '<program>', 'exec')
+        except (SyntaxError, RecursionError, MemoryError):
+            return node.accept(StackInterpreter(self.output))
+        if self.store is not None:
+            self.store(code)
+        self.execute(code)
+
+    def execute(self, code):  # runs <code> compiled from a program, cached or not
+        namespace = {'emit': print if self.output is None else self.output.print, 'op': Interpreter.op}
+        exec(code, namespace)
+        try:
+            namespace['__program__']()
+        finally:
+            if self.output is not None:
+                self.output.flush()
@@ -0,0 +1,245 @@
+#!/usr/bin/python
+import AST
+from TypeChecker import NodeVisitor
+from Interpreter import Interpreter
+from Resolver import Resolver
+
+# opcodes of the stack machine, see VM.py
+HALT = 0
+LOAD_CONST = 1
+LOAD_LOCAL = 2
+LOAD_GLOBAL = 3
+STORE_LOCAL = 4
+STORE_GLOBAL = 5
+BINARY_OP = 6
+JUMP = 7
+JUMP_IF_FALSE = 8
+CALL = 9
+RETURN = 10
+PRINT = 11
+POP = 12
+
+opnames = ['HALT', 'LOAD_CONST', 'LOAD_LOCAL', 'LOAD_GLOBAL', 'STORE_LOCAL', 'STORE_GLOBAL', 'BINARY_OP',
+           'JUMP', 'JUMP_IF_FALSE', 'CALL', 'RETURN', 'PRINT', 'POP']
+
+# number of arguments following each opcode in Code.code
+oparg_count = [0, 1, 1, 1, 1, 1, 1, 1, 1, 2, 0, 0, 0]
+
+# binary operators indexed by BINARY_OP argument, semantics shared with the tree-walking Interpreter
+binops = list(Interpreter.op.keys())
+binop_funs = [Interpreter.op[op] for op in binops]
+
+expression_nodes = (AST.BinExpr, AST.Const, AST.Variable, AST.Funcall)
+
+
+class Code(object):
+    def __init__(self, name, nargs=0):
+        self.name = name
+        self.nargs = nargs
+        self.nlocals = nargs
+        self.code = []    # flat list: opcode followed by its arguments
+        self.consts = []
+
+    def const(self, value):  # index of <value> in the constant pool
+        for i, c in enumerate(self.consts):
+            if c == value and type(c) is type(value) and (type(c) is not float or repr(c) == repr(value)):
+                return i  # 0.0 and -0.0 are equal but print differently
+        self.consts.append(value)
+        return len(self.consts) - 1
+
+    def emit(self, op, *args):  # appends instruction, returns its offset
+        pos = len(self.code)
+        self.code.append(op)
+        self.code.extend(args)
+        return pos
+
+    def patch(self, pos, target):  # sets jump target of instruction at <pos>
+        self.code[pos + 1] = target
+
+    def dis(self):
+        lines = []
+        pc = 0
+        while pc < len(self.code):
+            op = self.code[pc]
+            args = self.code[pc + 1:pc + 1 + oparg_count[op]]
+            text = '{0:5} {1:14} {2}'.format(pc, opnames[op], ' '.join(str(a) for a in args))
+            if op == LOAD_CONST:
+                text += ' ({0!r})'.format(self.consts[args[0]])
+            elif op == BINARY_OP:
+                text += ' ({0})'.format(binops[args[0]])
+            lines.append(text.rstrip())
+            pc += 1 + oparg_count[op]
+        return '\n'.join(lines)
+
+
+class Bytecode(object):
+    def __init__(self, main, functions, nglobals):
+        self.main = main
+        self.functions = functions
+        self.nglobals = nglobals
+
+    def dis(self):
+        parts = []
+        for code in [self.main] + self.functions:
+            parts.append('{0} (args: {1}, locals: {2}):\n{3}'.format(code.name, code.nargs, code.nlocals, code.dis()))
+        return '\n\n'.join(parts)
+
+
+class Compiler(NodeVisitor):
+    # lowers type checked AST into Bytecode executed by VM
+
+    def visit_Program(self, node):
+        if not hasattr(node, 'frame_size'):
+            node.accept(Resolver())
+        self.main = Code('<main>')
+        self.code = self.main
+        self.functions = []
+        self.function_index = {}
+        self.loops = []  # (continue jumps, break jumps) to be patched
+        for child in node.children:
+            self.visit(child)
+        self.code.emit(HALT)
+        return Bytecode(self.main, self.functions, node.frame_size)
+
+    def store(self, slot):  # emits store to variable at resolved (depth, slot)
+        if slot is None:
+            self.code.emit(POP)
+        elif slot[0] or self.code is self.main:
+            self.code.emit(STORE_GLOBAL, slot[1])
+        else:
+            self.code.emit(STORE_LOCAL, slot[1])
+
+    # constructions and instructions
+
+    def visit_Construction(self, node):
+        self.visit(node.code)
+
+    def visit_Instruction(self, node):
+        self.visit(node.instruction)
+        if isinstance(node.instruction, expression_nodes):
+            self.code.emit(POP)
+
+    def visit_LabeledInstr(self, node):
+        self.visit(node.instruction)
+
+    def visit_Declaration(self, node):
+        for init in node.value.list:
+            self.visit(init)
+
+    def visit_Init(self, node):
+        self.visit(node.expr)
+        self.store(node.slot)
+
+    def visit_Assignment(self, node):
+        self.visit(node.expression)
+        self.store(node.slot)
+
+    def visit_PrintInstr(self, node):
+        if isinstance(node.expression, AST.Node):
+            self.visit(node.expression)
+            self.code.emit(PRINT)
+
+    def visit_CompoundInstr(self, node, fundef=False):
+        self.visit(node.declarations)
+        self.visit(node.instructions)
+
+    def visit_ChoiceInstr(self, node):
+        self.visit(node.condition)
+        jump_else = self.code.emit(JUMP_IF_FALSE, 0)
+        self.visit(node.instruction)
+        if node.instruction_else is not None:
+            jump_end = self.code.emit(JUMP, 0)
+            self.code.patch(jump_else, len(self.code.code))
+            self.visit(node.instruction_else)
+            self.code.patch(jump_end, len(self.code.code))
+        else:
+            self.code.patch(jump_else, len(self.code.code))
+
+    def visit_WhileInstr(self, node):
+        start = len(self.code.code)
+        self.visit(node.condition)
+        jump_end = self.code.emit(JUMP_IF_FALSE, 0)
+        self.loops.append(([], []))
+        self.visit(node.instruction)
+        continues, breaks = self.loops.pop()
+        self.code.emit(JUMP, start)
+        end = len(self.code.code)
+        self.code.patch(jump_end, end)
+        for pos in continues:
+            self.code.patch(pos, start)
+        for pos in breaks:
+            self.code.patch(pos, end)
+
+    def visit_RepeatInstr(self, node):
+        start = len(self.code.code)
+        self.loops.append(([], []))
+        self.visit(node.instructions)
+        continues, breaks = self.loops.pop()
+        check = len(self.code.code)
+        self.visit(node.condition)
+        self.code.emit(JUMP_IF_FALSE, start)
+        end = len(self.code.code)
+        for pos in continues:
+            self.code.patch(pos, check)
+        for pos in breaks:
+            self.code.patch(pos, end)
+
+    def visit_BreakInstr(self, node):
+        if self.loops:
+            self.loops[-1][1].append(self.code.emit(JUMP, 0))
+
+    def visit_ContinueInstr(self, node):
+        if self.loops:
+            self.loops[-1][0].append(self.code.emit(JUMP, 0))
+
+    def visit_ReturnInstr(self, node):
+        self.visit(node.expression)
+        self.code.emit(RETURN)
+
+    def visit_Condition(self, node):
+        self.visit(node.expression)
+
+    def visit_Fundef(self, node):
+        code = Code(node.id, len(node.args.list))
+        code.nlocals = node.frame_size
+        self.function_index[node.id] = len(self.functions)
+        self.functions.append(code)
+
+        outer_code, outer_loops = self.code, self.loops
+        self.code = code
+        self.loops = []
+        self.visit_CompoundInstr(node.instr, fundef=True)
+        # function falling off its end returns nothing
+        code.emit(LOAD_CONST, code.const(None))
+        code.emit(RETURN)
+        self.code, self.loops = outer_code, outer_loops
+
+    # expressions
+
+    def visit_BinExpr(self, node):
+        self.visit(node.left)
+        self.visit(node.right)
+        self.code.emit(BINARY_OP, binops.index(node.op))
+
+    def visit_Integer(self, node):
+        self.code.emit(LOAD_CONST, self.code.const(int(node.value)))
+
+    def visit_Float(self, node):
+        self.code.emit(LOAD_CONST, self.code.const(float(node.value)))
+
+    def visit_String(self, node):
+        self.code.emit(LOAD_CONST, self.code.const(str(node.value[1:-1])))
+
+    def visit_Variable(self, node):
+        slot = node.slot
+        if slot is None:
+            self.code.emit(LOAD_CONST, self.code.const(None))
+        elif slot[0] or self.code is self.main:
+            self.code.emit(LOAD_GLOBAL, slot[1])
+        else:
+            self.code.emit(LOAD_LOCAL, slot[1])
+
+    def visit_Funcall(self, node):
+        for arg in node.args.list:
+            self.visit(arg)
+        self.code.emit(CALL, self.function_index[node.id], len(node.args.list))
@@ -6,9 +6,10 @@ import AST
 
 
 class Cparser(object):
-    def __init__(self):
+    def __init__(self, build=True):  # build=False leaves building the lexer to the caller
         self.scanner = Scanner()
-        self.scanner.build()
+        if build:
+            self.scanner.build()
 
     tokens = Scanner.tokens
 
@@ -37,18 +38,19 @@ class Cparser(object):
     def p_program(self, p):
         """program : constructions
                    | """
-        p[0] = AST.Program(p[1])
+        p[0] = AST.Program(AST.ConstructionList.from_list(p[1] if len(p) > 1 else []))
+
+    # list productions (constructions, declarations, inits, instructions, expr_list, args_list) accumulate
+    # into plain python lists, the list node is built once by the production using the whole list
 
     def p_constructions(self, p):
         """constructions : constructions construction
                          | construction"""
-        if len(p) > 1:
-            if isinstance(p[1], AST.ConstructionList):
-                p[1].add_to_list(p[2])
-                p[0] = p[1]
-            else:
-                p[0] = AST.ConstructionList()
-                p[0].add_to_list(p[1])
+        if len(p) > 2:
+            p[1].append(p[2])
+            p[0] = p[1]
+        else:
+            p[0] = [p[1]]
 
     def p_construction(self, p):
         """construction : declaration
@@ -60,35 +62,29 @@ class Cparser(object):
         """declarations : declarations declaration
                        | """
 
-        if len(p) > 1:
-            if p[1] == None:
-                p[1] = AST.DeclarationList()
-
+        if len(p) > 2:
+            p[1].append(p[2])
             p[0] = p[1]
-            if len(p) > 2:
-                p[1].add_to_list(p[2])
         else:
-            p[0] = AST.DeclarationList()
+            p[0] = []
 
 
     def p_declaration(self, p):
         """declaration : TYPE inits ';'
                        | error ';' """
-        p[0] = AST.Declaration(p[1], p[2], p.lineno(1))
+        if len(p) > 3:
+            p[0] = AST.Declaration(p[1], AST.InitList.from_list(p[2]), p.lineno(1))
+        else:
+            p[0] = AST.Declaration(p[1], p[2], p.lineno(1))
 
     def p_inits(self, p):
         """inits : inits ',' init
                  | init """
         if len(p) > 2:
-            if p[1] == None:
-                p[0] = AST.InitList()
-            else:
-                p[0] = p[1]
-            p[0].add_to_list(p[3])
-
+            p[1].append(p[3])
+            p[0] = p[1]
         else:
-            p[0] = AST.InitList()
-            p[0].add_to_list(p[1])
+            p[0] = [p[1]]
 
     def p_init(self, p):
         """init : ID '=' expression
@@ -99,13 +95,10 @@ class Cparser(object):
         """instructions : instructions instruction
                         | instruction """
         if len(p) > 2:
-            if p[1] == None:
-                p[1] = AST.InstructionList()
-
-            p[1].add_to_list(p[2])
+            p[1].append(p[2])
             p[0] = p[1]
         else:
-            p[0] = AST.InstructionList(p[1])
+            p[0] = [p[1]]
 
     def p_instruction(self, p):
         """instruction : print_instr
@@ -152,7 +145,7 @@ class Cparser(object):
 
     def p_repeat_instr(self, p):
         """repeat_instr : REPEAT instructions UNTIL condition ';' """
-        p[0] = AST.RepeatInstr(p[2], p[4], p.lineno(1))
+        p[0] = AST.RepeatInstr(AST.InstructionList.from_list(p[2]), p[4], p.lineno(1))
 
     def p_return_instr(self, p):
         """return_instr : RETURN expression ';' """
@@ -168,7 +161,8 @@ class Cparser(object):
 
     def p_compound_instr(self, p):
         """compound_instr : '{' declarations instructions '}' """
-        p[0] = AST.CompoundInstr(p[2], p[3], p.lineno(4))
+        p[0] = AST.CompoundInstr(AST.DeclarationList.from_list(p[2]), AST.InstructionList.from_list(p[3]),
+                                 p.lineno(4))
 
     def p_condition(self, p):
         """condition : expression"""
@@ -230,19 +224,16 @@ class Cparser(object):
     def p_expr_list_or_empty(self, p):
         """expr_list_or_empty : expr_list
                               | """
-        p[0] = p[1] if len(p) >= 2 else AST.ExpressionList()
+        p[0] = AST.ExpressionList.from_list(p[1]) if len(p) >= 2 else AST.ExpressionList()
 
     def p_expr_list(self, p):
         """expr_list : expr_list ',' expression
                      | expression """
         if len(p) > 2:
-            if p[1] is None:
-                p[1] = AST.ExpressionList()
+            p[1].append(p[3])
             p[0] = p[1]
-            p[0].add_to_list(p[3])
         else:
-            p[0] = AST.ExpressionList()
-            p[0].add_to_list(p[1])
+            p[0] = [p[1]]
 
     def p_fundef(self, p):
         """fundef : TYPE ID '(' args_list_or_empty ')' compound_instr """
@@ -251,19 +242,16 @@ class Cparser(object):
     def p_args_list_or_empty(self, p):
         """args_list_or_empty : args_list
                               | """
-        p[0] = p[1] if len(p) > 1 else AST.ArgList(line = p.lineno(0))
+        p[0] = AST.ArgList.from_list(p[1]) if len(p) > 1 else AST.ArgList(line = p.lineno(0))
 
     def p_args_list(self, p):
         """args_list : args_list ',' arg
                      | arg """
         if len(p) > 2:
-            if p[1] is None:
-                p[1] = AST.ArgList()
+            p[1].append(p[3])
             p[0] = p[1]
-            p[0].add_to_list(p[3])
         else:
-            p[0] = AST.ArgList()
-            p[0].add_to_list(p[1])
+            p[0] = [p[1]]
 
 
 
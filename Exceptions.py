@@ -1,11 +1,14 @@
-class ReturnValueException(Exception):
-    def __init__(self, value):
-        self.value = value
+# completion signals of instructions, used by interpreters instead of exceptions:
+# None - normal completion, BREAK, CONTINUE or a 1-tuple (value,) - return of value
+BREAK = 'break'
+CONTINUE = 'continue'
 
 
-class BreakException(Exception):
-    pass
+class TailCall(object):
+    # signal of return f(...) inside f: the call <node> with its evaluated arguments <args> is to be run
+    # by the caller in place of the current one
+    __slots__ = ('node', 'args')
 
-
-class ContinueException(Exception):
-    pass
\ No newline at end of file
+    def __init__(self, node, args):
+        self.node = node
+        self.args = args
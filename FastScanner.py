@@ -0,0 +1,95 @@
+#!/usr/bin/python
+import re
+from functools import partial
+from ply.lex import LexToken
+from scanner import Scanner, CHUNK_SIZE
+
+
+def rule(name):  # regex of Scanner rule t_<name>, a docstring for function rules
+    rule = getattr(Scanner, 't_' + name)
+    return rule if isinstance(rule, str) else rule.__doc__
+
+
+# Scanner rules in the order ply.lex tries them: function rules as defined, then string rules longest first;
+# literals only when no rule matches, anything else is an illegal character
+function_rules = ['newline', 'newline2', 'LINE_COMMENT', 'BLOCK_COMMENT', 'FLOAT', 'INTEGER', 'STRING', 'TYPE', 'ID']
+string_rules = sorted(['EQ', 'NEQ', 'LE', 'GE', 'OR', 'AND', 'SHL', 'SHR'],
+                      key=lambda name: len(rule(name)), reverse=True)
+
+master = re.compile('[{0}]*(?:'.format(re.escape(Scanner.t_ignore)) + '|'.join(
+    ['(?P<{0}>{1})'.format(name, rule(name)) for name in function_rules + string_rules] +
+    ['(?P<literal>[{0}])'.format(re.escape(Scanner.literals)),
+     '(?P<error>[^{0}])'.format(re.escape(Scanner.t_ignore))]) + ')', re.VERBOSE)
+
+# token types which are the name of their rule
+typed = frozenset(['FLOAT', 'INTEGER', 'STRING', 'TYPE'] + string_rules)
+
+
+class FastLexer(object):
+    # lexer with the interface of ply.lex.Lexer used by Scanner and yacc, matching all rules of Scanner at once
+    # with a single regex and telling them apart by the name of the matched group. Ignored characters are matched
+    # as a prefix of the next token; token() is a C level call resuming the generator of tokens
+
+    def __init__(self, scanner):
+        self.scanner = scanner
+        self.lineno = 1
+        self.input('')
+
+    def input(self, text):
+        self.lexdata = text
+        self.lexpos = 0
+        self.token = partial(next, self.tokens(text), None)
+
+    def skip(self, n):  # illegal characters are always skipped one at a time
+        pass
+
+    def tokens(self, data):
+        reserved = Scanner.reserved
+        for m in master.finditer(data):
+            kind = m.lastgroup
+            value = m.group(kind)
+            tok = LexToken()
+            if kind == 'ID':
+                tok.type = reserved.get(value, 'ID')
+            elif kind == 'literal':
+                tok.type = value
+            elif kind in typed:
+                tok.type = kind
+            elif kind == 'newline':
+                self.lineno += len(value)
+                continue
+            elif kind == 'newline2':
+                self.lineno += len(value) / 2
+                continue
+            elif kind == 'BLOCK_COMMENT':
+                self.lineno += value.count('\n')
+                continue
+            elif kind == 'LINE_COMMENT':
+                continue
+            else:  # illegal character, reported by Scanner.t_error
+                tok.type = 'error'
+                tok.value = data[m.start(kind):]
+                tok.lineno = self.lineno
+                tok.lexer = self
+                self.scanner.t_error(tok)
+                continue
+            tok.value = value
+            tok.lineno = self.lineno
+            tok.lexpos = m.start(kind)
+            yield tok
+
+
+class FastScanner(Scanner):
+    # Scanner producing the same tokens (types, values, lineno, lexpos) with FastLexer instead of ply.lex;
+    # streaming input and columns work as in Scanner
+
+    def build(self, **kwargs):  # ply.lex options are not used
+        self.lexer = FastLexer(self)
+
+    def input(self, text):
+        super().input(text)
+        self.token = self.lexer.token  # whole text given to the lexer, tokens need no adjustment by Scanner.token
+
+    def input_stream(self, stream, chunk_size=CHUNK_SIZE):
+        self.__dict__.pop('token', None)
+        super().input_stream(stream, chunk_size)
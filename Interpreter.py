@@ -2,15 +2,25 @@
 import AST
 import SymbolTable
 from Memory import *
+from Resolver import Resolver
+from Purity import Purity
 from Exceptions import *
 from visit import *
 import sys
 
 sys.setrecursionlimit(10000)
 
+MISSING = object()
+
+
+def memo_key(args):
+    # arguments equal in Python can still print differently (1 and True, 0.0 and -0.0), so their type
+    # and for floats their repr are part of the key
+    return tuple((arg.__class__, repr(arg) if arg.__class__ is float else arg) for arg in args)
+
+
 class Interpreter(object):
-    memory_stack_global = MemoryStack(Memory('global'))
-    memory_stack_local = MemoryStack()
+    # variables live in array-backed Frames, addressed by (depth, slot) pairs assigned by Resolver
     op = {'+': lambda x, y: x + y,
           '-': lambda x, y: x - y,
           '*': lambda x, y: x * y,
@@ -29,14 +39,40 @@ class Interpreter(object):
           '!=': lambda x, y: x != y
           }
 
+    def __init__(self, memoize=None, output=None):
+        # all execution state belongs to the instance, so interpreters can run side by side
+        # memoize - size of LRU cache of results kept for every pure function, None - no memoization
+        # output - sink of printed values (Output.py), None - builtin print
+        self.global_frame = Frame('global', 0)
+        self.frame = self.global_frame
+        self.functions = {}
+        self.memoize = memoize
+        self.memo = {}  # pure function name -> LRUCache of its results keyed on argument values
+        self.output = output
+        self.emit = print if output is None else output.print
+
     @on('node')
     def visit(self, node):
         pass
 
+    # instructions complete with a signal instead of raising exceptions: None - normal completion,
+    # BREAK or CONTINUE, (value,) - return of value; expressions return their value
+
     @when(AST.Program)
     def visit(self, node):
-        for child in node.children:
-            self.visit(child)
+        if not hasattr(node, 'frame_size'):
+            node.accept(Resolver())
+        self.global_frame = Frame('global', node.frame_size)
+        self.frame = self.global_frame
+        self.functions = {}
+        if self.memoize is not None:
+            self.memo = {name: LRUCache(self.memoize) for name in node.accept(Purity())}
+        try:
+            for child in node.children:
+                self.visit(child)
+        finally:
+            if self.output is not None:
+                self.output.flush()
 
     @when(AST.BinExpr)
     def visit(self, node):
@@ -49,11 +85,8 @@ class Interpreter(object):
     @when(AST.Assignment)
     def visit(self, node):
         value = self.visit(node.expression)
-        val_memory = self.memory_stack_local.get(node.id)
-        if val_memory is None:
-            self.memory_stack_global.set(node.id, value)
-        else:
-            self.memory_stack_local.set(node.id, value)
+        if node.slot is not None:
+            self.frame.set(node.slot[0], node.slot[1], value)
 
     @when(AST.Const)
     def visit(self, node):
@@ -61,32 +94,25 @@ class Interpreter(object):
 
     @when(AST.RepeatInstr)
     def visit(self, node):
-        try:
-            while(True):
-                try:
-                    self.visit(node.instructions)
-                except ContinueException as ce:
-                    if not self.visit(node.condition):
-                        self.visit(node)
-                if self.visit(node.condition):
-                    break
-        # TODO: Break - check scopes
-        except BreakException as be:
-            return
+        while(True):
+            signal = self.visit(node.instructions)
+            if signal is not None:
+                if signal is BREAK:
+                    return
+                if signal is not CONTINUE:
+                    return signal
+            if self.visit(node.condition):
+                break
 
     @when(AST.WhileInstr)
     def visit(self, node):
-        # _len = len(self.memory_stack_local.memory)
-        try:
-            while self.visit(node.condition):
-                try:
-                    self.visit(node.instruction)
-                except ContinueException as ce:
-                    #self.visit(node)
-                    continue
-        except BreakException as be:
-            # self.memory_stack_local.memory = self.memory_stack_local.memory[:_len-1]
-            return
+        while self.visit(node.condition):
+            signal = self.visit(node.instruction)
+            if signal is not None:
+                if signal is BREAK:
+                    return
+                if signal is not CONTINUE:
+                    return signal
 
     @when(AST.Condition)
     def visit(self, node):
@@ -95,54 +121,74 @@ class Interpreter(object):
     @when(AST.ChoiceInstr)
     def visit(self, node):
         if self.visit(node.condition):
-            self.visit(node.instruction)
-        else:
-            self.visit(node.instruction_else)
+            return self.visit(node.instruction)
+        elif node.instruction_else is not None:
+            return self.visit(node.instruction_else)
 
     @when(AST.Fundef)
     def visit(self, node):
-        self.memory_stack_global.insert(node.id, (node.args, node.instr))
+        self.functions[node.id] = node
 
     @when(AST.Funcall)
     def visit(self, node):
+        fun = self.functions[node.id]
+        frame = Frame(node.id, fun.frame_size, self.global_frame)
+        for i, arg_call in enumerate(node.args.list):
+            frame.vals[i] = self.visit(arg_call)
+        cache = self.memo.get(node.id)
+        if cache is not None:
+            key = memo_key(frame.vals[:len(node.args.list)])
+            result = cache.get(key, MISSING)
+            if result is MISSING:
+                result = self.call(fun, frame)
+                cache.put(key, result)
+            return result
+        return self.call(fun, frame)
+
+    def memo_report(self):  # hit and miss counts of memoized functions
+        return ['{0}: {1} hits, {2} misses'.format(name, cache.hits, cache.misses)
+                for name, cache in sorted(self.memo.items())]
+
+    def call(self, fun, frame):  # runs body of function <fun> in its prepared <frame>, returns its result
+        caller = self.frame
+        self.frame = frame
         try:
-            fun = self.memory_stack_global.get(node.id)
-            arg_calls = []
-            for arg_call in node.args.list:
-                arg_calls.append(self.visit(arg_call))
-            self.memory_stack_local.push(Memory(node.id))
-            for arg_def, arg_call in zip(fun[0].list, arg_calls):
-                self.memory_stack_local.insert(arg_def.name, arg_call)
-
-            self.visit(fun[1], True)
-        except ReturnValueException as e:
-            while self.memory_stack_local.memory[-1].name != node.id:
-                self.memory_stack_local.pop()
-            self.memory_stack_local.pop()
-            return e.value
+            signal = self.visit(fun.instr, True)
+            # return fun(...) loops here, reusing the frame, instead of nesting calls
+            while signal.__class__ is TailCall:
+                target = self.functions[signal.node.id]
+                if target is not fun:  # name of the function got redefined since
+                    frame = Frame(target.id, target.frame_size, self.global_frame)
+                    frame.vals[:len(signal.args)] = signal.args
+                    return self.call(target, frame)
+                frame.vals[:len(signal.args)] = signal.args
+                signal = self.visit(fun.instr, True)
+        finally:
+            self.frame = caller
+        if signal is not None:
+            return signal[0]
 
     @when(AST.ReturnInstr)
     def visit(self, node):
-        raise ReturnValueException(self.visit(node.expression))
+        if node.tail:
+            return TailCall(node.expression, [self.visit(arg) for arg in node.expression.args.list])
+        return (self.visit(node.expression),)
 
     @when(AST.BreakInstr)
     def visit(self, node):
-        raise BreakException()
+        return BREAK
 
     @when(AST.ContinueInstr)
     def visit(self, node):
-        raise ContinueException()
+        return CONTINUE
 
     @when(AST.PrintInstr)
     def visit(self, node):
-        print(self.visit(node.expression))
+        self.emit(self.visit(node.expression))
 
     @when(AST.Init)
     def visit(self, node):
-        if len(self.memory_stack_local.memory) > 0:
-            self.memory_stack_local.insert(node.ID, self.visit(node.expr))
-        else:
-            self.memory_stack_global.insert(node.ID, self.visit(node.expr))
+        self.frame.vals[node.slot[1]] = self.visit(node.expr)
 
     @when(AST.Integer)
     def visit(self, node):
@@ -158,11 +204,8 @@ class Interpreter(object):
 
     @when(AST.Variable)
     def visit(self, node):
-        val = self.memory_stack_local.get(node.name)
-        if val is not None:
-            return val
-        else:
-            return self.memory_stack_global.get(node.name)
+        if node.slot is not None:
+            return self.frame.get(node.slot[0], node.slot[1])
 
     @when(AST.Node)
     def visit(self, node):
@@ -175,21 +218,40 @@ class Interpreter(object):
         for child in node.children:
             self.visit(child)
 
+    @when(AST.Construction)
+    def visit(self, node):
+        return self.visit(node.code)
+
+    @when(AST.Declaration)
+    def visit(self, node):
+        for init in node.value.list:
+            self.visit(init)
+
+    @when(AST.Instruction)
+    def visit(self, node):
+        signal = self.visit(node.instruction)
+        if not isinstance(node.instruction, (AST.BinExpr, AST.Const, AST.Variable, AST.Funcall)):
+            return signal
+
+    @when(AST.LabeledInstr)
+    def visit(self, node):
+        return self.visit(node.instruction)
+
+    @when(AST.InstructionList)
+    def visit(self, node):
+        for child in node.list:
+            signal = self.visit(child)
+            if signal is not None:
+                return signal
+
+    @when(AST.DeclarationList)
+    def visit(self, node):
+        for child in node.list:
+            self.visit(child)
+
     @when(AST.CompoundInstr)
     def visit(self, node, fundef=False):
-        if not fundef:
-            try:
-                self.memory_stack_local.push(Memory('while'))
-                # print('|' + str(node.line))
-                self.visit(node.declarations)
-                self.visit(node.instructions)
-                self.memory_stack_local.pop()
-                # print('\\' + str(node.line))
-            except (BreakException, ContinueException):
-                self.memory_stack_local.pop()
-                # print('/' + str(node.line))
-                raise
-        else:
-            self.visit(node.declarations)
-            self.visit(node.instructions)
+        # block variables have their own slots in the enclosing frame, no frame is pushed here
+        self.visit(node.declarations)
+        return self.visit(node.instructions)
 
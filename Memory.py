@@ -1,54 +1,44 @@
-class Memory:
-    def __init__(self, name):  # memory name
-        self.vals = {}
-        self.name = name
+from collections import OrderedDict
+
 
-    def has_key(self, name):  # variable name
-        return name in self.vals.keys()
-
-    def get(self, name):  # gets from memory current value of variable <name>
-        return self.vals.get(name)
-
-    def put(self, name, value):  # puts into memory current value of variable <name>
-        self.vals[name] = value
-
-
-class MemoryStack:
-    def __init__(self, memory=None):  # initialize memory stack with memory <memory>
-        self.memory = []
-        if memory is not None:
-            self.memory.append(memory)
-
-    def get(self, name):  # gets from memory stack current value of variable <name>
-        # val_memory = self.get(name)
-        for mem in self.memory[::-1]:
-            if mem.name == 'while':
-                if mem.has_key(name):
-                    return mem.get(name)
-            else:
-                if mem.has_key(name):
-                    return mem.get(name)
-                return None
-        return None
-
-    def insert(self, name, value):  # inserts into memory stack variable <name> with value <value>
-        self.memory[-1].put(name, value)
-
-    def set(self, name, value):  # sets variable <name> to value <value>
-        val_memory = None
-        if val_memory is None:
-            for mem in self.memory[::-1]:
-                if mem.name == 'while':
-                    if mem.has_key(name):
-                        mem.put(name, value)
-                        return
-                else:
-                    if mem.has_key(name):
-                        mem.put(name, value)
-                        return
-
-    def push(self, memory):  # pushes memory <memory> onto the stack
-        self.memory.append(memory)
-
-    def pop(self):  # pops the top memory from the stack
-        self.memory = self.memory[:-1]
\ No newline at end of file
+class Frame:
+    def __init__(self, name, size, parent=None):  # frame <name> with <size> slots resolved by Resolver
+        self.name = name
+        self.vals = [None] * size
+        self.parent = parent  # frame of the enclosing scope, global frame for functions
+
+    def get(self, depth, slot):  # gets value of variable <slot> in frame <depth> levels out
+        frame = self
+        while depth:
+            frame = frame.parent
+            depth -= 1
+        return frame.vals[slot]
+
+    def set(self, depth, slot, value):  # sets variable <slot> in frame <depth> levels out to value <value>
+        frame = self
+        while depth:
+            frame = frame.parent
+            depth -= 1
+        frame.vals[slot] = value
+
+
+class LRUCache:
+    def __init__(self, size):  # cache keeping at most <size> most recently used entries
+        self.size = size
+        self.vals = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):  # gets value stored under <key> and marks it as most recently used
+        if key in self.vals:
+            self.hits += 1
+            self.vals.move_to_end(key)
+            return self.vals[key]
+        self.misses += 1
+        return default
+
+    def put(self, key, value):  # stores <value> under <key>, evicting the least recently used entry if full
+        self.vals[key] = value
+        self.vals.move_to_end(key)
+        if len(self.vals) > self.size:
+            self.vals.popitem(last=False)
@@ -0,0 +1,384 @@
+#!/usr/bin/python
+import AST
+from TypeChecker import NodeVisitor, TypeChecker
+from Interpreter import Interpreter
+
+# operators whose result is always an int (or a runtime error), whatever the operands are
+int_ops = ('%', '<<', '>>')
+# bitwise operators give a bool for two bool operands, an int only when one of them is not a bool
+bit_ops = ('|', '&', '^')
+compare_ops = ('>', '>=', '<', '<=', '==', '!=')
+
+# largest constants created by folding, bigger results are left to be computed at run time
+MAX_INT_BITS = 4096
+MAX_STRING = 1024
+
+
+def const_value(node):  # value the Interpreter gives to constant <node>
+    if isinstance(node, AST.Integer):
+        return int(node.value)
+    if isinstance(node, AST.Float):
+        return float(node.value)
+    return str(node.value[1:-1])
+
+
+def const_type(node):  # TypeChecker type of constant <node>
+    if isinstance(node, AST.Integer):
+        return 'int'
+    if isinstance(node, AST.Float):
+        return 'float'
+    return 'string'
+
+
+def const_node(value, line):  # constant node evaluating to <value>, None if it cannot (or should not) be made
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return AST.Integer(str(value), line) if value.bit_length() <= MAX_INT_BITS else None
+    if isinstance(value, float):
+        return AST.Float(repr(value), line)
+    if isinstance(value, str) and len(value) <= MAX_STRING:
+        return AST.String('"' + value + '"', line)
+    return None
+
+
+def is_int(node, value):  # whether <node> is an Integer constant equal to <value>
+    return isinstance(node, AST.Integer) and int(node.value) == value
+
+
+def weaker(kind1, kind2):  # what is known about a value of <kind1> or of <kind2>
+    if kind1 is None or kind2 is None:
+        return None
+    return 'int' if kind1 == kind2 == 'int' else 'value'
+
+
+class Declared(object):
+    # variable or argument declared with <type> and expressions whose values it receives
+    def __init__(self, type):
+        self.type = type
+        self.writes = []
+
+
+class Variables(NodeVisitor):
+    # finds the declaration every Variable refers to and values written to every declared variable: initializers,
+    # assigned expressions and, for arguments, expressions passed by calls; names are scoped like in OptimizationPass2
+
+    def visit_Program(self, node):
+        self.scopes = [{}]  # name -> Declared, innermost scope last
+        self.declared = []
+        self.variables = {}  # Variable -> Declared
+        self.args = {}  # function name -> Declared of arguments of its definitions
+        self.calls = []
+        self.generic_visit(node)
+        for call in self.calls:
+            for args in self.args.get(call.id, ()):
+                for arg, value in zip(args, call.args.list):
+                    arg.writes.append(value)
+        return self
+
+    def lookup(self, name):
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return None
+
+    def declare(self, name, type):
+        declared = Declared(type)
+        self.declared.append(declared)
+        self.scopes[-1][name] = declared
+        return declared
+
+    def visit_Fundef(self, node):
+        self.scopes[-1][node.id] = None
+        self.scopes.append({})
+        args = [self.declare(arg.name, arg.type) for arg in node.args.list]
+        self.args.setdefault(node.id, []).append(args)
+        self.visit_CompoundInstr(node.instr, fundef=True)
+        self.scopes.pop()
+
+    def visit_CompoundInstr(self, node, fundef=False):
+        if not fundef:
+            self.scopes.append({})
+        self.visit(node.declarations)
+        self.visit(node.instructions)
+        if not fundef:
+            self.scopes.pop()
+
+    def visit_Declaration(self, node):
+        for init in node.value.list:
+            self.visit(init.expr)
+            self.declare(init.ID, node.type).writes.append(init.expr)
+
+    def visit_Assignment(self, node):
+        self.visit(node.expression)
+        declared = self.lookup(node.id)
+        if declared is not None:
+            declared.writes.append(node.expression)
+
+    def visit_Variable(self, node):
+        declared = self.lookup(node.name)
+        if declared is not None:
+            self.variables[node] = declared
+
+    def visit_Funcall(self, node):
+        self.calls.append(node)
+        self.visit(node.args)
+
+    def visit_BinExpr(self, node):  # nested operands are walked with an explicit stack, chains can be very long
+        stack = [node]
+        while stack:
+            expr = stack.pop()
+            if expr.__class__ is AST.BinExpr:
+                stack.append(expr.right)
+                stack.append(expr.left)
+            else:
+                self.visit(expr)
+
+    def visit_ChoiceInstr(self, node):
+        self.visit(node.condition)
+        self.visit(node.instruction)
+        self.visit(node.instruction_else)
+
+    def visit_RepeatInstr(self, node):
+        self.visit(node.instructions)
+        self.visit(node.condition)
+
+    def visit_ReturnInstr(self, node):
+        self.visit(node.expression)
+
+
+class NodeTransformer(NodeVisitor):
+    # visitor rewriting the tree in place: every visit returns the node replacing the visited one,
+    # None removes a statement (construction, declaration or instruction)
+
+    def generic_visit(self, node):
+        if isinstance(node, AST.NodeList):
+            node.list = [child for child in map(self.visit, node.list) if child is not None]
+        else:
+            for name in node.child_fields:
+                child = getattr(node, name)
+                if child is not None:
+                    setattr(node, name, self.visit(child))
+        return node
+
+    def statement(self, node):  # visits instruction which cannot be removed, empty block takes place of removed one
+        result = self.visit(node)
+        if result is None:
+            return AST.Instruction(AST.CompoundInstr(AST.DeclarationList(), AST.InstructionList(), None))
+        return result
+
+    def visit_Program(self, node):
+        node.constructions = self.visit(node.constructions)
+        return node
+
+    def visit_Construction(self, node):
+        node.code = self.visit(node.code)
+        return node if node.code is not None else None
+
+    def visit_Declaration(self, node):
+        for init in node.value.list:
+            self.visit(init)
+        return node
+
+    def visit_Instruction(self, node):
+        instruction = self.visit(node.instruction)
+        if instruction is None or isinstance(instruction, AST.Instruction):
+            return instruction  # pruned if statement, replaced by its taken branch or removed
+        node.instruction = instruction
+        return node
+
+    def visit_LabeledInstr(self, node):
+        node.instruction = self.statement(node.instruction)
+        return node
+
+    def visit_WhileInstr(self, node):
+        node.condition = self.visit(node.condition)
+        node.instruction = self.statement(node.instruction)
+        return node
+
+    def visit_RepeatInstr(self, node):
+        node.instructions = self.visit(node.instructions)
+        node.condition = self.visit(node.condition)
+        return node
+
+    def visit_ChoiceInstr(self, node):
+        node.condition = self.visit(node.condition)
+        node.instruction = self.statement(node.instruction)
+        if node.instruction_else is not None:
+            node.instruction_else = self.statement(node.instruction_else)
+        return node
+
+    def visit_ReturnInstr(self, node):
+        node.expression = self.visit(node.expression)
+        return node
+
+    def visit_Funcall(self, node):
+        node.args = self.visit(node.args)
+        return node
+
+    def visit_BinExpr(self, node):  # nested operands are walked with an explicit stack, chains can be very long
+        stack = [node]
+        while stack:
+            expr = stack.pop()
+            for name in ('left', 'right'):
+                operand = getattr(expr, name)
+                if operand.__class__ is AST.BinExpr:
+                    stack.append(operand)
+                else:
+                    setattr(expr, name, self.visit(operand))
+        return node
+
+
+class OptimizationPass1(NodeTransformer):
+    # constant folding and algebraic simplification of a type checked program, done in place before Resolver runs.
+    # Folding evaluates operators with Interpreter.op and only for operand types accepted by TypeChecker.ttype,
+    # operations failing at run time (division by zero, illegal operands in unchecked code) are left alone.
+    # Comparison results are Python bools printed as True/False, so they are folded only where just their truth
+    # matters (conditions); identities like x*1 are simplified only where x is known not to hold such a bool.
+    # A variable is known not to hold one when its declared type is int, float or string and no value it
+    # receives may be a bool; an int variable counts as an int only if every value it receives is an int too.
+
+    def __init__(self):
+        self.folded = 0
+        self.simplified = 0
+        self.pruned = 0
+        self.kinds = {}  # BinExpr -> its kind, rewriting keeps values so it stays true
+        self.variables = {}  # Variable -> Declared
+        self.declared = {}  # Declared -> kind of values the variable holds
+
+    def visit_Program(self, node):
+        variables = node.accept(Variables())
+        self.variables = variables.variables
+        bounds = {'int': 'int', 'float': 'value', 'string': 'value'}
+        self.declared = {declared: bounds.get(declared.type) for declared in variables.declared}
+        # kinds only get weaker, so this stops once every variable is as weak as the values it receives
+        changed = True
+        while changed:
+            changed = False
+            self.kinds = {}
+            for declared, kind in self.declared.items():
+                for value in declared.writes:
+                    kind = weaker(kind, self.kind(value))
+                    if kind is None:
+                        break
+                if kind != self.declared[declared]:
+                    self.declared[declared] = kind
+                    changed = True
+        self.kinds = {}
+        return super().visit_Program(node)
+
+    def visit_ChoiceInstr(self, node):
+        node.condition = self.visit(node.condition)
+        if isinstance(node.condition.expression, AST.Const):
+            self.pruned += 1
+            if const_value(node.condition.expression):
+                return self.visit(node.instruction)
+            if node.instruction_else is not None:
+                return self.visit(node.instruction_else)
+            return None
+        node.instruction = self.statement(node.instruction)
+        if node.instruction_else is not None:
+            node.instruction_else = self.statement(node.instruction_else)
+        return node
+
+    def visit_Condition(self, node):
+        # only truth of a condition is used, so a constant comparison can become 1 or 0
+        expression = self.visit(node.expression)
+        if isinstance(expression, AST.BinExpr) and expression.op in compare_ops:
+            value = self.fold(expression)
+            if value is not None:
+                expression = AST.Integer('1' if value else '0', expression.line)
+        node.expression = expression
+        return node
+
+    def fold(self, node):  # value of BinExpr <node> with constant operands, None if it is not folded
+        left, right = node.left, node.right
+        if not isinstance(left, AST.Const) or not isinstance(right, AST.Const):
+            return None
+        types = TypeChecker.ttype.get(node.op, {}).get(const_type(left), {})
+        if const_type(right) not in types:
+            return None
+        x, y = const_value(left), const_value(right)
+        if node.op == '<<' and y > MAX_INT_BITS:
+            return None
+        if node.op == '*' and isinstance(x, str) and y * len(x) > MAX_STRING:
+            return None
+        try:
+            return Interpreter.op[node.op](x, y)
+        except (ArithmeticError, ValueError, TypeError):
+            return None
+
+    def kind(self, node):
+        # what is known about value of expression <node>: 'int', 'value' - anything but a bool, None - unknown;
+        # operands of nested BinExprs are looked at with an explicit stack, chains can be very long,
+        # and kinds of BinExprs are remembered, simplifying each link of a chain asks for the kind of the rest
+        kinds = []
+        stack = [(node, False)]
+        while stack:
+            expr, combined = stack.pop()
+            if combined:
+                right, left = kinds.pop(), kinds.pop()
+                if left == right == 'int' and expr.op != '/':
+                    self.kinds[expr] = 'int'
+                else:
+                    self.kinds[expr] = 'value' if expr.op not in bit_ops else None
+                kinds.append(self.kinds[expr])
+            elif expr in self.kinds:
+                kinds.append(self.kinds[expr])
+            elif isinstance(expr, AST.Integer) or isinstance(expr, AST.BinExpr) and expr.op in int_ops:
+                kinds.append('int')
+            elif isinstance(expr, AST.Const):
+                kinds.append('value')
+            elif expr.__class__ is AST.Variable:
+                kinds.append(self.declared.get(self.variables.get(expr)))
+            elif isinstance(expr, AST.BinExpr) and expr.op not in compare_ops:
+                stack.append((expr, True))
+                stack.append((expr.right, False))
+                stack.append((expr.left, False))
+            else:
+                kinds.append(None)
+        return kinds[0]
+
+    def visit_BinExpr(self, node):
+        # operands being BinExprs themselves are rewritten with an explicit stack instead of recursion,
+        # each before the expression using them, so long chains like a+a+...+a fit in the python stack
+        results = []
+        stack = [(node, False)]
+        while stack:
+            expr, visited = stack.pop()
+            if visited:
+                expr.right = results.pop()
+                expr.left = results.pop()
+                results.append(self.rewrite(expr))
+            elif expr.__class__ is AST.BinExpr:
+                stack.append((expr, True))
+                stack.append((expr.right, False))
+                stack.append((expr.left, False))
+            else:
+                results.append(self.visit(expr))
+        return results[0]
+
+    def rewrite(self, node):  # constant or simpler expression replacing BinExpr <node> with rewritten operands
+        value = self.fold(node)
+        if value is not None:
+            const = const_node(value, node.line)
+            if const is not None:
+                self.folded += 1
+                return const
+        result = self.simplify(node)
+        if result is not node:
+            self.simplified += 1
+        return result
+
+    def simplify(self, node):
+        # identities keeping the exact value: x*1, 1*x, x-0, x<<0 and x>>0 hold for any non-bool x,
+        # x+0, 0+x, x|0, 0|x, x^0 and 0^x only for ints (-0.0+0 is 0.0)
+        op, left, right = node.op, node.left, node.right
+        if op in ('*', '-', '<<', '>>', '+', '|', '^'):
+            required = 'value' if op in ('*', '-', '<<', '>>') else 'int'
+            unit = 1 if op == '*' else 0
+            if is_int(right, unit) and self.kind(left) in (required, 'int'):
+                return left
+            if op in ('*', '+', '|', '^') and is_int(left, unit) and self.kind(right) in (required, 'int'):
+                return right
+        return node
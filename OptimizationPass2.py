@@ -0,0 +1,250 @@
+#!/usr/bin/python
+import AST
+from TypeChecker import NodeVisitor
+from OptimizationPass1 import NodeTransformer
+
+# operators failing at run time for some right operands: zero divisor, negative shift count
+checked_ops = {'/': lambda y: y != 0, '%': lambda y: y != 0, '<<': lambda y: y >= 0, '>>': lambda y: y >= 0}
+
+
+def pure(node):
+    # whether evaluating expression <node> can neither have an effect (calls may print) nor fail;
+    # nested BinExprs are looked at with an explicit stack, chains can be very long
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, AST.BinExpr):
+            if node.op in checked_ops:
+                right = node.right
+                if not isinstance(right, (AST.Integer, AST.Float)) or not checked_ops[node.op](float(right.value)):
+                    return False
+            stack.append(node.right)
+            stack.append(node.left)
+        elif not isinstance(node, (AST.Const, AST.Variable)):
+            return False
+    return True
+
+
+def line(node):  # source line of <node>, taken from the first descendant which knows it
+    if getattr(node, 'line', None) is not None:
+        return node.line
+    for child in (getattr(node, 'condition', None),) + node.children:
+        if isinstance(child, AST.Node):
+            found = line(child)
+            if found is not None:
+                return found
+    return None
+
+
+def abrupt(node):  # whether instruction <node> always ends with return, break or continue
+    if isinstance(node, (AST.Instruction, AST.LabeledInstr)):
+        return abrupt(node.instruction)
+    if isinstance(node, (AST.ReturnInstr, AST.BreakInstr, AST.ContinueInstr)):
+        return True
+    if isinstance(node, AST.CompoundInstr):
+        return any(abrupt(instruction) for instruction in node.instructions.list)
+    if isinstance(node, AST.ChoiceInstr):
+        return node.instruction_else is not None and abrupt(node.instruction) and abrupt(node.instruction_else)
+    return False
+
+
+class Local(object):
+    # variable declared in a block or function body with nodes writing and reading it
+    def __init__(self, name, line):
+        self.name = name
+        self.line = line
+        self.inits = []
+        self.assignments = []
+        self.reads = 0
+
+
+class Usage(NodeVisitor):
+    # finds reads and writes of every local variable and functions called by every function (None - top level code);
+    # reads inside a pure assignment to the variable itself (x = x + 1) do not count
+
+    def visit_Program(self, node):
+        self.scopes = [{}]  # name -> Local (None - global or argument, not tracked), innermost scope last
+        self.locals = []
+        self.calls = {None: set()}
+        self.function = None
+        self.writing = None
+        self.generic_visit(node)
+        return self
+
+    def lookup(self, name):
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return None
+
+    def visit_Fundef(self, node):
+        self.calls.setdefault(node.id, set())
+        self.function = node.id
+        self.scopes.append({arg.name: None for arg in node.args.list})
+        self.visit_CompoundInstr(node.instr, fundef=True)
+        self.scopes.pop()
+        self.function = None
+
+    def visit_CompoundInstr(self, node, fundef=False):
+        if not fundef:
+            self.scopes.append({})
+        self.visit(node.declarations)
+        self.visit(node.instructions)
+        if not fundef:
+            self.scopes.pop()
+
+    def visit_Declaration(self, node):
+        for init in node.value.list:
+            self.visit(init)
+
+    def visit_Init(self, node):
+        self.visit(node.expr)
+        local = None
+        if len(self.scopes) > 1:
+            local = Local(node.ID, node.line)
+            local.inits.append(node)
+            self.locals.append(local)
+        self.scopes[-1][node.ID] = local
+
+    def visit_Assignment(self, node):
+        local = self.lookup(node.id)
+        if local is not None:
+            local.assignments.append(node)
+            self.writing = local if pure(node.expression) else None
+        self.visit(node.expression)
+        self.writing = None
+
+    def visit_Variable(self, node):
+        local = self.lookup(node.name)
+        if local is not None and local is not self.writing:
+            local.reads += 1
+
+    def visit_Funcall(self, node):
+        self.calls[self.function].add(node.id)
+        self.visit(node.args)
+
+    def visit_BinExpr(self, node):  # nested operands are walked with an explicit stack, chains can be very long
+        stack = [node]
+        while stack:
+            expr = stack.pop()
+            if expr.__class__ is AST.BinExpr:
+                stack.append(expr.right)
+                stack.append(expr.left)
+            else:
+                self.visit(expr)
+
+    def visit_ChoiceInstr(self, node):
+        self.visit(node.condition)
+        self.visit(node.instruction)
+        self.visit(node.instruction_else)
+
+    def visit_RepeatInstr(self, node):
+        self.visit(node.instructions)
+        self.visit(node.condition)
+
+    def visit_ReturnInstr(self, node):
+        self.visit(node.expression)
+
+
+class OptimizationPass2(NodeTransformer):
+    # dead code elimination on a type checked program, done in place before Resolver runs:
+    # - instructions following return, break or continue in the same block
+    # - functions not reachable by calls from top level code
+    # - writes of local variables which are never read; assignments whose expression may have an effect
+    #   are kept as expression statements, such initializations are kept as they are
+    # Removing code can make more of it dead, so this is repeated until nothing more is removed.
+    # Write-only variables whose initialization may have an effect are kept, the report lists them too.
+    # Top level statements are never unreachable, the interpreter ignores return, break and continue there.
+
+    def __init__(self):
+        self.removed = []  # (line, description) of removed code
+        self.kept = []  # (line, description) of write-only variables kept, found by the last analysis
+        self.changes = 0
+
+    def visit_Program(self, node):
+        self.removed = []
+        while True:
+            changes = self.changes
+            self.analyse(node.accept(Usage()))
+            super().visit_Program(node)
+            if self.changes == changes:
+                return node
+
+    def remove(self, node, what):
+        self.changes += 1
+        if what is not None:
+            self.removed.append((line(node), what))
+
+    def analyse(self, usage):
+        self.dead_writes = set()
+        self.effect_writes = set()
+        self.kept = []
+        for local in usage.locals:
+            if local.reads == 0 and (local.inits or local.assignments):
+                for assignment in local.assignments:
+                    (self.dead_writes if pure(assignment.expression) else self.effect_writes).add(assignment)
+                dead_inits = [init for init in local.inits if pure(init.expr)]
+                self.dead_writes.update(dead_inits)
+                if len(dead_inits) == len(local.inits):  # its removed writes are not reported one by one
+                    self.removed.append((local.line, "write-only variable '{0}'".format(local.name)))
+                else:
+                    self.kept.append((local.line, "write-only variable '{0}' kept, its initialization may have "
+                                                  "an effect".format(local.name)))
+        self.called = set()
+        pending = [None]
+        while pending:
+            for name in usage.calls.get(pending.pop(), ()):
+                if name not in self.called:
+                    self.called.add(name)
+                    pending.append(name)
+
+    def report(self):  # lines describing removed code and kept write-only variables in source order
+        return ['line {0}: {1}'.format(line, what)
+                for line, what in sorted(self.removed + self.kept, key=lambda r: r[0] or 0)]
+
+    def visit_Fundef(self, node):
+        if node.id not in self.called:
+            self.remove(node, "function '{0}' never called".format(node.id))
+            return None
+        return self.generic_visit(node)
+
+    def visit_Declaration(self, node):
+        inits = []
+        for init in node.value.list:
+            if init in self.dead_writes:
+                self.remove(init, None)
+            else:
+                inits.append(init)
+        node.value.list = inits
+        return node if inits else None
+
+    def visit_Assignment(self, node):
+        if node in self.dead_writes:
+            self.remove(node, None)
+            return None
+        if node in self.effect_writes:
+            self.remove(node, None)
+            return node.expression
+        return node
+
+    def visit_Instruction(self, node):
+        result = super().visit_Instruction(node)
+        if isinstance(result, AST.Instruction) and isinstance(result.instruction, (AST.BinExpr, AST.Const, AST.Variable)) \
+                and pure(result.instruction):
+            self.remove(result, 'unused expression')
+            return None
+        return result
+
+    def visit_InstructionList(self, node):
+        instructions = []
+        for i, instruction in enumerate(node.list):
+            instruction = self.visit(instruction)
+            if instruction is None:
+                continue
+            instructions.append(instruction)
+            if abrupt(instruction):
+                for unreachable in node.list[i + 1:]:
+                    self.remove(unreachable, 'unreachable instruction')
+                break
+        node.list = instructions
+        return node
@@ -0,0 +1,82 @@
+#!/usr/bin/python
+import sys
+
+# sinks taking values printed by print instructions of a program in place of the builtin print, which writes
+# every line through sys.stdout separately. Backends call print(value) of the sink for each print instruction
+# and flush() when the program ends, normally or with an error
+
+# characters collected by BufferedSink before they are written
+FLUSH_SIZE = 1 << 16
+
+
+class BufferedSink(object):
+    # writes printed lines to <file> (sys.stdout current at the time of writing if None) in pieces of at least
+    # <flush_size> characters
+
+    def __init__(self, file=None, flush_size=FLUSH_SIZE):
+        self.file = file
+        self.flush_size = flush_size
+        self.lines = []
+        self.size = 0
+
+    def print(self, value):
+        line = str(value)
+        self.lines.append(line)
+        self.size += len(line) + 1
+        if self.size >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        if self.lines:
+            file = self.file or sys.stdout
+            self.lines.append('')
+            file.write('\n'.join(self.lines))
+            self.lines = []
+            self.size = 0
+
+
+class MemorySink(object):
+    # keeps printed lines in memory, getvalue() returns them as print would have written them
+
+    def __init__(self):
+        self.lines = []
+
+    def print(self, value):
+        self.lines.append(str(value))
+
+    def flush(self):
+        pass
+
+    def getvalue(self):
+        return ''.join(line + '\n' for line in self.lines)
+
+
+class NullSink(object):
+    # drops printed values, for measuring programs without their output
+
+    def print(self, value):
+        pass
+
+    def flush(self):
+        pass
+
+
+class SkippingSink(object):
+    # drops the first <count> printed values and passes the rest to <sink> (builtin print if None), for a program
+    # run again after it printed them
+
+    def __init__(self, sink, count):
+        self.sink = sink
+        self.count = count
+
+    def print(self, value):
+        if self.count:
+            self.count -= 1
+        elif self.sink is None:
+            print(value)
+        else:
+            self.sink.print(value)
+
+    def flush(self):
+        if self.sink is not None:
+            self.sink.flush()
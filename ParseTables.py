@@ -0,0 +1,94 @@
+import os
+import hashlib
+import tempfile
+import importlib.util
+import ply.lex as lex
+import ply.yacc as yacc
+from Cparser import Cparser
+from scanner import Scanner
+
+# bump when layout of cached tables changes
+TABLES_VERSION = 1
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '__tables__')
+
+
+def grammar_hash():
+    # hash of everything the generated tables depend on: grammar rules (Cparser docstrings), start symbol,
+    # precedence, Scanner token rules and the ply version. ply takes rule functions in definition order, which
+    # picks the start symbol and breaks reduce/reduce ties, so they are hashed in that order
+    h = hashlib.sha1()
+    h.update('{0} {1} {2}\n'.format(TABLES_VERSION, yacc.__version__, yacc.__tabversion__).encode())
+    for rule in in_definition_order(Cparser, 'p_'):
+        if rule.__name__ != 'p_error':
+            h.update('{0}:{1}\n'.format(rule.__name__, rule.__doc__).encode())
+    h.update('start:{0!r}\n'.format(getattr(Cparser, 'start', None)).encode())
+    h.update(repr(Cparser.precedence).encode())
+    h.update(repr(Scanner.tokens).encode())
+    h.update(repr((Scanner.literals, Scanner.t_ignore, sorted(Scanner.reserved.items()))).encode())
+    for name in sorted(dir(Scanner)):
+        rule = getattr(Scanner, name)
+        if name.startswith('t_') and isinstance(rule, str):
+            h.update('{0}:{1}\n'.format(name, rule).encode())
+    for rule in in_definition_order(Scanner, 't_'):  # ply.lex tries function rules in this order too
+        h.update('{0}:{1}\n'.format(rule.__name__, rule.__doc__).encode())
+    return h.hexdigest()[:16]
+
+
+def in_definition_order(cls, prefix):  # functions of <cls> named <prefix>... in source order
+    rules = [getattr(cls, name) for name in dir(cls) if name.startswith(prefix)]
+    return sorted((rule for rule in rules if callable(rule)), key=lambda rule: rule.__code__.co_firstlineno)
+
+
+def _load_module(path):
+    spec = importlib.util.spec_from_file_location(os.path.splitext(os.path.basename(path))[0], path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _build_lexer(scanner, cache_dir, key):
+    lextab = 'lextab_' + key
+    path = os.path.join(cache_dir, lextab + '.py')
+    if os.path.exists(path):
+        try:
+            scanner.build(optimize=1, lextab=_load_module(path), errorlog=lex.NullLogger())
+            return False
+        except Exception:
+            pass
+    # generate into temporary directory and move into place, so concurrent runs never see a partial file
+    with tempfile.TemporaryDirectory(dir=cache_dir) as tmp:
+        scanner.build(optimize=1, lextab=lextab, outputdir=tmp, errorlog=lex.NullLogger())
+        os.replace(os.path.join(tmp, lextab + '.py'), path)
+    return True
+
+
+def _build_parser(cparser, cache_dir, key):
+    path = os.path.join(cache_dir, 'parsetab_' + key + '.pickle')
+    if os.path.exists(path):
+        try:
+            lr = yacc.LRTable()
+            lr.read_pickle(path)
+            lr.bind_callables({name: getattr(cparser, name) for name in dir(cparser) if name.startswith('p_')})
+            return yacc.LRParser(lr, cparser.p_error), False
+        except Exception:
+            pass
+    fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix='.pickle')
+    os.close(fd)
+    os.remove(tmp)
+    parser = yacc.yacc(module=cparser, debug=False, picklefile=tmp, errorlog=yacc.NullLogger())
+    os.replace(tmp, path)
+    return parser, True
+
+
+def cached_parser(cache_dir=None):
+    # Cparser and its parser built from tables cached in <cache_dir> under a hash of the grammar,
+    # tables are generated (cold start) only when no cache entry for the current grammar exists
+    # returns (cparser, parser, cold)
+    cache_dir = cache_dir or CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    key = grammar_hash()
+    cparser = Cparser(build=False)
+    cold_lexer = _build_lexer(cparser.scanner, cache_dir, key)
+    parser, cold_parser = _build_parser(cparser, cache_dir, key)
+    return cparser, parser, cold_lexer or cold_parser
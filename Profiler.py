@@ -0,0 +1,97 @@
+#!/usr/bin/python
+import time
+import AST
+from Interpreter import Interpreter
+from OptimizationPass2 import line
+
+
+class Stats(object):
+    # executions and times of a source line or a function; total time counts only outermost activations,
+    # so recursion is not counted twice, self time excludes time of nested lines and calls
+    __slots__ = ('count', 'total', 'self', 'active')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.self = 0.0
+        self.active = 0
+
+
+class ProfilingInterpreter(Interpreter):
+    # Interpreter measuring every statement (by its source line) and every function call; plain Interpreter
+    # has no profiling code at all, so profiling costs nothing unless this class is used.
+    # Statements and calls nest: a call is part of the statement calling it, statements of its body are part
+    # of the call. Tail calls run as a loop inside a single call and are not counted separately, results of
+    # memoized functions taken from their cache are not calls.
+
+    def __init__(self, memoize=None, output=None, clock=time.perf_counter):
+        super().__init__(memoize, output)
+        self.clock = clock
+        self.lines = {}      # source line -> Stats
+        self.calls = {}      # function name -> Stats, '<program>' for the whole program
+        self.stacks = {}     # tuple of names of active functions -> self time spent in the innermost one
+        self.stack = []
+        self.children = 0.0  # time of measured statements and calls nested in the current one
+        self.node_lines = {}
+
+    def visit(self, node, *args):
+        cls = node.__class__
+        if cls is AST.Instruction or cls is AST.Init:
+            number = self.node_lines.get(node)
+            if number is None:
+                number = self.node_lines[node] = line(node) or 0
+            stats = self.lines.get(number)
+            if stats is None:
+                stats = self.lines[number] = Stats()
+            return self.timed(stats, None, Interpreter.visit, self, node, *args)
+        if cls is AST.Program:
+            return self.timed_call('<program>', Interpreter.visit, self, node)
+        return Interpreter.visit(self, node, *args)
+
+    def call(self, fun, frame):
+        return self.timed_call(fun.id, Interpreter.call, self, fun, frame)
+
+    def timed_call(self, name, run, *args):
+        stats = self.calls.get(name)
+        if stats is None:
+            stats = self.calls[name] = Stats()
+        self.stack.append(name)
+        try:
+            return self.timed(stats, tuple(self.stack), run, *args)
+        finally:
+            self.stack.pop()
+
+    def timed(self, stats, stack, run, *args):  # result of run(*args), its time added to <stats> and <stack>
+        stats.count += 1
+        stats.active += 1
+        outer = self.children
+        self.children = 0.0
+        start = self.clock()
+        try:
+            return run(*args)
+        finally:
+            elapsed = self.clock() - start
+            own = elapsed - self.children
+            stats.self += own
+            if stats.active == 1:
+                stats.total += elapsed
+            stats.active -= 1
+            if stack is not None:
+                self.stacks[stack] = self.stacks.get(stack, 0.0) + own
+            self.children = outer + elapsed
+
+    def report(self, limit=None):  # lines of tables of functions and source lines, by self time
+        result = ['{0:>20} {1:>10} {2:>12} {3:>12}'.format('function', 'calls', 'total [ms]', 'self [ms]')]
+        for name, stats in sorted(self.calls.items(), key=lambda item: -item[1].self)[:limit]:
+            result.append('{0:>20} {1:10} {2:12.3f} {3:12.3f}'.format(name, stats.count, stats.total * 1e3,
+                                                                      stats.self * 1e3))
+        result.append('{0:>20} {1:>10} {2:>12} {3:>12}'.format('line', 'executions', 'total [ms]', 'self [ms]'))
+        for number, stats in sorted(self.lines.items(), key=lambda item: -item[1].self)[:limit]:
+            result.append('{0:20} {1:10} {2:12.3f} {3:12.3f}'.format(number, stats.count, stats.total * 1e3,
+                                                                     stats.self * 1e3))
+        return result
+
+    def collapsed_stacks(self):
+        # lines 'caller;...;function microseconds' of the collapsed stack format read by flamegraph tools
+        return ['{0} {1}'.format(';'.join(stack), int(round(own * 1e6)))
+                for stack, own in sorted(self.stacks.items())]
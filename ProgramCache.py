@@ -0,0 +1,209 @@
+import os
+import sys
+import json
+import time
+import pickle
+import hashlib
+import tempfile
+import ply.yacc as yacc
+import AST
+import scanner
+import Cparser
+import TypeChecker
+import SymbolTable
+
+# bump when layout of cache entries changes
+CACHE_VERSION = 1
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '__programs__')
+
+# default limits: total size of entries and time since an entry was last used
+MAX_SIZE = 64 * 2 ** 20
+MAX_AGE = 7 * 24 * 3600
+
+# temporary files older than this were left by killed runs, younger ones may still be written by a concurrent run
+TMP_AGE = 3600
+
+STATS_FILE = 'stats.json'
+
+
+def sources_hash(modules, *extra):
+    # hash of sources of <modules> and of <extra> strings, with ply and python versions (pickle layout of nodes)
+    h = hashlib.sha1()
+    h.update('{0} {1} {2}\n'.format(CACHE_VERSION, yacc.__version__, sys.version_info[:2]).encode())
+    for text in extra:
+        h.update('{0}\n'.format(text).encode())
+    for module in modules:
+        with open(module.__file__, 'rb') as source:
+            h.update(source.read())
+    return h.hexdigest()[:16]
+
+
+def frontend_hash():
+    # hash of everything a parsed and checked program depends on: sources of the modules of Scanner, Cparser,
+    # TypeChecker with its symbol table and AST nodes, ply and python versions
+    return sources_hash((scanner, Cparser, TypeChecker, SymbolTable, AST))
+
+
+class DiskCache(object):
+    # on-disk cache of files named <version>_<key><suffix>: key is a hash of the text an entry is made from,
+    # version a hash of whatever else the entry depends on, so entries made by other versions are never read
+    # again and are evicted as they age. Entries not used for <max_age> seconds are removed, then the least
+    # recently used ones until the total size is within <max_size>.
+    # hits and misses count lookups of this instance, save_totals() adds them to totals kept in the cache
+    # directory once, at exit. A cache directory which cannot be written only makes every lookup a miss.
+    name = 'cache'
+    suffix = '.entry'
+
+    def __init__(self, version, cache_dir, max_size=MAX_SIZE, max_age=MAX_AGE):
+        self.version = version
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        except OSError:
+            pass
+
+    def path(self, text):
+        key = hashlib.sha1(text.encode('utf-8', 'surrogateescape')).hexdigest()
+        return os.path.join(self.cache_dir, '{0}_{1}{2}'.format(self.version, key, self.suffix))
+
+    def read(self, text, load):  # entry made from <text> as returned by load(path), None if there is no usable one
+        path = self.path(text)
+        try:
+            entry = load(path)
+        except Exception:
+            entry = None
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.touch(path)
+        return entry
+
+    def write(self, text, dump):
+        # entry made from <text> is written by dump(path) to a temporary file and moved into place, so concurrent
+        # runs never see a partial one; returns path of the entry, None if it could not be written (or dump
+        # returned False)
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            os.close(fd)
+        except OSError:
+            return None
+        path = self.path(text)
+        try:
+            if dump(tmp) is False:
+                self.remove(tmp)
+                return None
+            os.replace(tmp, path)
+        except (RecursionError, OSError):
+            self.remove(tmp)
+            return None
+        self.evict()
+        return path
+
+    def touch(self, path):  # marks entry at <path> as used now, for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # removed by a concurrent run or not writable
+
+    def entries(self, suffix=None):  # (last use, size, path) of every entry (or file ending with <suffix>)
+        result = []
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return result
+        for name in names:
+            if name.endswith(suffix or self.suffix):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue  # removed by a concurrent run
+                result.append((stat.st_mtime, stat.st_size, path))
+        return result
+
+    def evict(self):
+        now = time.time()
+        for modified, _, path in self.entries('.tmp'):
+            if now - modified > TMP_AGE:
+                self.remove(path)
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for used, size, path in entries:
+            if now - used <= self.max_age and total <= self.max_size:
+                break
+            self.remove(path)
+            total -= size
+
+    def totals(self):  # hits and misses of earlier runs, saved in the cache directory
+        try:
+            with open(os.path.join(self.cache_dir, STATS_FILE)) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {'hits': 0, 'misses': 0}
+
+    def save_totals(self):
+        # adds lookups of this instance to the saved totals, called once when the instance is no longer used;
+        # updates lost to concurrent runs are acceptable
+        if not self.hits and not self.misses:
+            return
+        totals = self.totals()
+        totals['hits'] += self.hits
+        totals['misses'] += self.misses
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, 'w') as file:
+                json.dump(totals, file)
+            os.replace(tmp, os.path.join(self.cache_dir, STATS_FILE))
+        except OSError:
+            self.remove(tmp)
+
+    def stats(self):
+        entries = self.entries()
+        totals = self.totals()
+        return {'hits': self.hits, 'misses': self.misses, 'total_hits': totals['hits'] + self.hits,
+                'total_misses': totals['misses'] + self.misses, 'entries': len(entries),
+                'size': sum(e[1] for e in entries)}
+
+    def report(self):
+        return [self.name + ': {hits} hits, {misses} misses ({total_hits} hits, {total_misses} misses in total), '
+                '{entries} entries, {size} bytes'.format(**self.stats())]
+
+
+def load_pickle(path):
+    with open(path, 'rb') as file:
+        return pickle.load(file)
+
+
+class ProgramCache(DiskCache):
+    # parsed and type checked programs keyed on their source text, with the front end as version; only valid
+    # programs are stored, with messages (warnings) printed while checking them
+    name = 'program cache'
+    suffix = '.pickle'
+
+    def __init__(self, cache_dir=None, max_size=MAX_SIZE, max_age=MAX_AGE):
+        super().__init__(frontend_hash(), cache_dir or CACHE_DIR, max_size, max_age)
+
+    def load(self, text):  # (program, messages) cached for source <text>, None if there is no usable entry
+        return self.read(text, load_pickle)
+
+    def store(self, text, program, messages=''):
+        # programs too deeply nested to be pickled, or which cannot be written, are not cached
+        def dump(path):
+            with open(path, 'wb') as file:
+                pickle.dump((program, messages), file, pickle.HIGHEST_PROTOCOL)
+        return self.write(text, dump) is not None
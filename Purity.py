@@ -0,0 +1,64 @@
+#!/usr/bin/python
+from TypeChecker import NodeVisitor
+
+
+class Purity(NodeVisitor):
+    # finds functions of a resolved program whose result depends only on their arguments and whose call has
+    # no effect: no print, no access to global (or unresolved) variables, calls only to such functions.
+    # Recursive functions are pure unless something else makes them impure.
+    # visit of Program returns set of names of pure functions
+
+    def visit_Program(self, node):
+        self.calls = {}     # function name -> names of functions it calls
+        self.impure = set()
+        self.function = None
+        self.generic_visit(node)
+        pure = set(self.calls) - self.impure
+        changed = True
+        while changed:
+            changed = False
+            for name in list(pure):
+                if not self.calls[name] <= pure:
+                    pure.remove(name)
+                    changed = True
+        return pure
+
+    def local(self, slot):  # whether variable at resolved <slot> belongs to the frame of the current function
+        return slot is not None and slot[0] == 0
+
+    def visit_Fundef(self, node):
+        self.calls.setdefault(node.id, set())
+        self.function = node.id
+        self.visit(node.instr)
+        self.function = None
+
+    def visit_PrintInstr(self, node):
+        if self.function is not None:
+            self.impure.add(self.function)
+        self.visit(node.expression)
+
+    def visit_Assignment(self, node):
+        if self.function is not None and not self.local(node.slot):
+            self.impure.add(self.function)
+        self.visit(node.expression)
+
+    def visit_Variable(self, node):
+        if self.function is not None and not self.local(node.slot):
+            self.impure.add(self.function)
+
+    def visit_Funcall(self, node):
+        if self.function is not None:
+            self.calls[self.function].add(node.id)
+        self.visit(node.args)
+
+    def visit_ChoiceInstr(self, node):
+        self.visit(node.condition)
+        self.visit(node.instruction)
+        self.visit(node.instruction_else)
+
+    def visit_RepeatInstr(self, node):
+        self.visit(node.instructions)
+        self.visit(node.condition)
+
+    def visit_ReturnInstr(self, node):
+        self.visit(node.expression)
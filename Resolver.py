@@ -0,0 +1,108 @@
+#!/usr/bin/python
+import AST
+from TypeChecker import NodeVisitor
+from SymbolTable import SymbolTable, VariableSymbol
+
+
+class Resolver(NodeVisitor):
+    # assigns every variable of a type checked program a (depth, slot) address:
+    # depth is the number of frames to walk out from the current one (0 - own frame, 1 - global frame inside
+    # a function), slot is the index in that frame. Nested compound instructions are flattened into the frame
+    # of the enclosing function, so Program and Fundef get frame_size - number of slots their frame needs.
+    # Variable, Assignment, Init and Arg nodes get a slot attribute (None for unresolved names).
+    # ReturnInstr gets tail - whether it returns result of a call to the function it is in (return f(...) in f).
+
+    def visit_Program(self, node):
+        self.symbols = SymbolTable(None, 'global')
+        self.level = 0
+        self.frame_sizes = [0]
+        self.function = None
+        self.generic_visit(node)
+        node.frame_size = self.frame_sizes.pop()
+        return node
+
+    def declare(self, name, type):
+        symbol = VariableSymbol(name, type, self.level, self.frame_sizes[-1])
+        self.frame_sizes[-1] += 1
+        try:
+            self.symbols.put(name, symbol)
+        except (ValueError, NameError):
+            self.symbols.symbols[name] = symbol
+        return (0, symbol.slot)
+
+    def lookup(self, name):
+        try:
+            symbol = self.symbols.get(name)
+        except ValueError:
+            return None
+        if not isinstance(symbol, VariableSymbol):
+            return None
+        return (self.level - symbol.level, symbol.slot)
+
+    def visit_Declaration(self, node):
+        for init in node.value.list:
+            self.visit(init)
+
+    def visit_Init(self, node):
+        self.visit(node.expr)
+        node.slot = self.declare(node.ID, None)
+
+    def visit_Arg(self, node):
+        node.slot = self.declare(node.name, node.type)
+
+    def visit_Assignment(self, node):
+        self.visit(node.expression)
+        node.slot = self.lookup(node.id)
+
+    def visit_Variable(self, node):
+        node.slot = self.lookup(node.name)
+
+    def visit_Condition(self, node):
+        self.visit(node.expression)
+
+    def visit_BinExpr(self, node):  # nested operands are walked with an explicit stack, chains can be very long
+        stack = [node]
+        while stack:
+            expr = stack.pop()
+            if expr.__class__ is AST.BinExpr:
+                stack.append(expr.right)
+                stack.append(expr.left)
+            else:
+                self.visit(expr)
+
+    def visit_ChoiceInstr(self, node):
+        self.visit(node.condition)
+        self.visit(node.instruction)
+        self.visit(node.instruction_else)
+
+    def visit_RepeatInstr(self, node):
+        self.visit(node.instructions)
+        self.visit(node.condition)
+
+    def visit_ReturnInstr(self, node):
+        self.visit(node.expression)
+        node.tail = isinstance(node.expression, AST.Funcall) and node.expression.id == self.function
+
+    def visit_Funcall(self, node):
+        self.visit(node.args)
+
+    def visit_Fundef(self, node):
+        self.symbols = self.symbols.pushScope(node.id)
+        self.function = node.id
+        self.level += 1
+        self.frame_sizes.append(0)
+        for arg in node.args.list:
+            self.visit(arg)
+        self.visit_CompoundInstr(node.instr, fundef=True)
+        node.frame_size = self.frame_sizes.pop()
+        self.level -= 1
+        self.function = None
+        self.symbols = self.symbols.popScope()
+
+    def visit_CompoundInstr(self, node, fundef=False):
+        if not fundef:
+            self.symbols = self.symbols.pushScope('compound')
+        self.visit(node.declarations)
+        self.visit(node.instructions)
+        if not fundef:
+            self.symbols = self.symbols.popScope()
@@ -0,0 +1,128 @@
+#!/usr/bin/python
+import sys
+import time
+import resource
+import tracemalloc
+import contextlib
+from collections import Counter
+import AST
+from TypeChecker import TypeChecker
+from Interpreter import Interpreter
+from Serialization import slots
+
+
+def max_rss():  # peak resident set size of the process so far, in bytes
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage if sys.platform == 'darwin' else usage * 1024
+
+
+class RunStats(object):
+    # wall time and peak memory of the phases of a single run of a program, with counters of what they did.
+    # Peak memory is the peak resident set size of the process at the end of each phase (it grows only in phases
+    # needing more memory than any before), or with <trace_memory> the peak of memory allocated by python during
+    # the phase above what was allocated when it started, traced by tracemalloc - which slows everything down
+    # many times. Counting happens in CountingScanner, CountingTypeChecker and CountingInterpreter used in place
+    # of the scanner, TypeChecker and Interpreter; these have no counting code at all.
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.phases = []  # (name, seconds, peak bytes)
+        self.counters = {}
+        self.nodes = Counter()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] - base if self.trace_memory else max_rss()
+            self.phases.append((name, elapsed, peak))
+
+    def count_nodes(self, tree):  # adds nodes of <tree> by class, walked through all their fields
+        pending = [tree]
+        while pending:
+            node = pending.pop()
+            if isinstance(node, AST.Node):
+                self.nodes[node.__class__.__name__] += 1
+                pending.extend(getattr(node, name, None) for name in slots(node.__class__))
+            elif isinstance(node, (list, tuple)):
+                pending.extend(node)
+
+    def report(self):  # lines of tables of phases and counters
+        memory = 'allocated [kB]' if self.trace_memory else 'max RSS [kB]'
+        result = ['{0:>24} {1:>12} {2:>14}'.format('phase', 'time [ms]', memory)]
+        for name, elapsed, peak in self.phases:
+            result.append('{0:>24} {1:12.3f} {2:14.1f}'.format(name, elapsed * 1e3, peak / 1024))
+        result.append('{0:>24} {1:>12}'.format('counter', 'count'))
+        for name, count in self.counters.items():
+            result.append('{0:>24} {1:12}'.format(name, count))
+        if self.nodes:
+            result.append('{0:>24} {1:12}'.format('AST nodes', sum(self.nodes.values())))
+            for name, count in self.nodes.most_common():
+                result.append('{0:>24} {1:12}'.format(name, count))
+        return result
+
+
+class CountingScanner(object):
+    # stands in for <scanner> as the lexer of the parser, counting tokens handed to it as it parses
+
+    def __init__(self, scanner):
+        self.scanner = scanner
+        self.tokens = 0
+
+    def token(self):
+        token = self.scanner.token()
+        if token is not None:
+            self.tokens += 1
+        return token
+
+    def __getattr__(self, name):
+        return getattr(self.scanner, name)
+
+
+class CountingTypeChecker(TypeChecker):
+    # TypeChecker counting symbol table scopes it creates: tables assigned to symbols which are children of
+    # the current one (pushScope), or the global table of a checker without one yet
+    def __init__(self):
+        self.table = None
+        self.scopes = 0
+        super().__init__()
+
+    @property
+    def symbols(self):
+        return self.table
+
+    @symbols.setter
+    def symbols(self, table):
+        if table is not None and table.parent is self.table:
+            self.scopes += 1
+        self.table = table
+
+
+class CountingInterpreter(Interpreter):
+    # Interpreter counting function calls executed (a tail call runs in the frame of its caller, but counts) and
+    # frames pushed: the global frame and one for every evaluated call, results of memoized functions included
+
+    def __init__(self, memoize=None, output=None):
+        super().__init__(memoize, output)
+        self.calls = 0
+        self.frames = 0
+
+    def visit(self, node, *args):
+        cls = node.__class__
+        if cls is AST.Funcall or cls is AST.Program:
+            self.frames += 1
+        elif cls is AST.ReturnInstr and node.tail:
+            self.calls += 1
+        return Interpreter.visit(self, node, *args)
+
+    def call(self, fun, frame):
+        self.calls += 1
+        return Interpreter.call(self, fun, frame)
@@ -0,0 +1,188 @@
+#!/usr/bin/python
+import struct
+import hashlib
+import AST
+
+# Compact binary encoding of AST node trees (and of None, bools, ints, floats, strings, lists and tuples in them).
+# Values are written in post-order, each starting with a tag byte: a node follows its fields (in __slots__ order),
+# a list or tuple its items, so decoding is a single loop over a stack of values with no recursion and no
+# limit on nesting. Integers (line numbers) are zigzag varints, a string is written once and referred to by
+# its index afterwards.
+
+NONE = 0
+FALSE = 1
+TRUE = 2
+INT = 3          # zigzag varint
+FLOAT = 4        # 8 bytes, little endian double
+STRING = 5       # varint length, utf-8 bytes; next index of the string table
+STRING_REF = 6   # varint index of an earlier string
+LIST = 7         # varint number of items preceding it
+TUPLE = 8        # varint number of items preceding it
+UNSET = 9        # slot without a value
+NODE = 10        # NODE + index of node class in node_classes
+
+
+def all_subclasses(cls):
+    result = []
+    for subclass in cls.__subclasses__():
+        result.append(subclass)
+        result.extend(all_subclasses(subclass))
+    return result
+
+
+def slots(cls):  # names of all fields of node class <cls>, base class fields first
+    names = []
+    for klass in reversed(cls.__mro__):
+        names.extend(klass.__dict__.get('__slots__', ()))
+    return tuple(names)
+
+
+node_classes = sorted(set(cls for cls in all_subclasses(AST.Node) if cls.__module__ == AST.__name__),
+                      key=lambda cls: cls.__name__)
+if NODE + len(node_classes) > 256:
+    raise ImportError("too many node classes for a single byte tag")
+
+# encoded data starts with MAGIC and a hash of node classes and their fields, so a changed AST.py is detected
+MAGIC = b'AST\x01'
+LAYOUT_HASH = hashlib.sha1(repr([(cls.__name__, slots(cls)) for cls in node_classes]).encode()).digest()[:8]
+HEADER = MAGIC + LAYOUT_HASH
+
+double = struct.Struct('<d')
+
+
+class Closing(object):
+    # bytes written after all fields (or items) of a node (or sequence) have been written
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data
+
+
+unset = object()
+
+
+def varint(n):
+    out = bytearray()
+    while n >= 0x80:
+        out.append(n & 0x7f | 0x80)
+        n >>= 7
+    out.append(n)
+    return out
+
+
+node_closing = {cls: Closing(bytes([NODE + i])) for i, cls in enumerate(node_classes)}
+node_fields = {cls: tuple(reversed(slots(cls))) for cls in node_classes}  # reversed, as pushed on the work stack
+decoding = [(cls, slots(cls), len(slots(cls))) for cls in node_classes]
+
+
+def encode(value):  # bytes of <value>, usually an AST.Program
+    out = bytearray(HEADER)
+    strings = {}
+    work = [value]
+    pop = work.pop
+    push = work.append
+    while work:
+        value = pop()
+        cls = value.__class__
+        closing = node_closing.get(cls)
+        if closing is not None:
+            push(closing)
+            for name in node_fields[cls]:
+                push(getattr(value, name, unset))
+        elif cls is Closing:
+            out += value.data
+        elif cls is str:
+            index = strings.get(value)
+            if index is None:
+                strings[value] = len(strings)
+                data = value.encode()
+                out.append(STRING)
+                out += varint(len(data))
+                out += data
+            else:
+                out.append(STRING_REF)
+                out += varint(index)
+        elif cls is int:
+            out.append(INT)
+            out += varint(value << 1 if value >= 0 else (-value << 1) - 1)
+        elif value is None:
+            out.append(NONE)
+        elif cls is list or cls is tuple:
+            push(Closing(bytes([LIST if cls is list else TUPLE]) + varint(len(value))))
+            work.extend(reversed(value))
+        elif cls is bool:
+            out.append(TRUE if value else FALSE)
+        elif cls is float:
+            out.append(FLOAT)
+            out += double.pack(value)
+        elif value is unset:
+            out.append(UNSET)
+        else:
+            raise TypeError("cannot encode {0} object".format(cls.__name__))
+    return bytes(out)
+
+
+def decode(data):  # value encoded in bytes <data>
+    if data[:len(HEADER)] != HEADER:
+        raise ValueError("data is not an encoded tree of the current AST node classes")
+    values = []
+    push = values.append
+    strings = []
+    pos = len(HEADER)
+    end = len(data)
+    new = object.__new__
+    while pos < end:
+        tag = data[pos]
+        pos += 1
+        if tag >= NODE:
+            cls, fields, count = decoding[tag - NODE]
+            node = new(cls)
+            if count:
+                for name, value in zip(fields, values[-count:]):
+                    if value is not unset:
+                        setattr(node, name, value)
+                del values[-count:]
+            push(node)
+            continue
+        if tag == STRING_REF or tag == STRING or tag == INT or tag == LIST or tag == TUPLE:
+            n = data[pos]  # varint
+            pos += 1
+            if n >= 0x80:
+                n &= 0x7f
+                shift = 7
+                while True:
+                    byte = data[pos]
+                    pos += 1
+                    n |= (byte & 0x7f) << shift
+                    if byte < 0x80:
+                        break
+                    shift += 7
+            if tag == STRING_REF:
+                push(strings[n])
+            elif tag == STRING:
+                value = data[pos:pos + n].decode()
+                pos += n
+                strings.append(value)
+                push(value)
+            elif tag == INT:
+                push(n >> 1 if not n & 1 else -((n + 1) >> 1))
+            elif n:
+                items = values[-n:]
+                del values[-n:]
+                push(items if tag == LIST else tuple(items))
+            else:
+                push([] if tag == LIST else ())
+        elif tag == NONE:
+            push(None)
+        elif tag == UNSET:
+            push(unset)
+        elif tag == TRUE or tag == FALSE:
+            push(tag == TRUE)
+        elif tag == FLOAT:
+            push(double.unpack_from(data, pos)[0])
+            pos += 8
+        else:
+            raise ValueError("unknown tag {0} at offset {1}".format(tag, pos - 1))
+    if len(values) != 1:
+        raise ValueError("encoded data is incomplete")
+    return values[0]
@@ -0,0 +1,207 @@
+#!/usr/bin/python
+import AST
+from Memory import Frame
+from Resolver import Resolver
+from Interpreter import Interpreter
+
+# continuations kept on the work stack next to nodes still to be evaluated, as tuples (code, argument)
+APPLY = 0         # pops two values, pushes result of binary operator <argument>
+DISCARD = 1       # pops value of an expression statement
+STORE = 2         # pops value into variable at resolved slot <argument>
+PRINT = 3         # pops value and prints it
+BRANCH = 4        # pops condition value and schedules a branch of ChoiceInstr <argument>
+WHILE_TEST = 5    # pops condition value, schedules another iteration of WhileInstr <argument> if true
+WHILE = 6         # marks running body of WhileInstr <argument>, schedules its condition when reached
+REPEAT_TEST = 7   # pops condition value, schedules another iteration of RepeatInstr <argument> if false
+REPEAT = 8        # marks running body of RepeatInstr <argument>, schedules its condition when reached
+CALL = 9          # pops arguments of Funcall and starts function <argument>
+FRAME = 10        # marks running function body, restores caller frame <argument> and pushes None when reached
+RETURN = 11       # pops return value and unwinds the work stack to the nearest FRAME
+TOP = 12          # marks running top level construction, return, break and continue do not get past it
+APPLY_CONST = 13  # pops value, pushes result of operator with constant right operand, <argument> - (operator, value)
+APPLY_VAR = 14    # pops value, pushes result of operator with variable right operand, <argument> - (operator, slot)
+
+expression_nodes = (AST.BinExpr, AST.Const, AST.Variable, AST.Funcall)
+loop_markers = (WHILE, REPEAT)
+boundary_markers = (FRAME, TOP)
+
+
+class StackInterpreter(object):
+    # drop-in alternative for Interpreter evaluating the tree with explicit stacks instead of python recursion:
+    # work holds nodes to evaluate and continuations to run after them, values holds results of expressions.
+    # Nesting of expressions and depth of user recursion are limited only by memory.
+    # return, break and continue pop the work stack down to the marker of their function or loop.
+
+    def __init__(self, output=None):  # output - sink of printed values (Output.py), None - builtin print
+        self.output = output
+
+    def visit(self, node):
+        if not hasattr(node, 'frame_size'):
+            node.accept(Resolver())
+        self.global_frame = Frame('global', node.frame_size)
+        self.frame = self.global_frame
+        self.functions = {}
+        self.work = []
+        self.values = []
+        for construction in reversed(node.constructions.list):
+            self.work.append((TOP, None))
+            self.work.append(construction)
+        try:
+            self.run()
+        finally:
+            if self.output is not None:
+                self.output.flush()
+
+    def unwind(self, codes):  # pops work stack down to nearest marker with code in <codes> or a boundary one
+        work = self.work
+        while work:
+            item = work.pop()
+            if item.__class__ is tuple and (item[0] in codes or item[0] in boundary_markers):
+                return item
+        return None
+
+    def run(self):
+        work = self.work
+        values = self.values
+        push_work = work.append
+        push = values.append
+        pop = values.pop
+        ops = Interpreter.op
+        global_frame = self.global_frame
+        frame = self.frame
+        emit = print if self.output is None else self.output.print
+
+        while work:
+            item = work.pop()
+            cls = item.__class__
+            if cls is tuple:
+                code, arg = item
+                if code == APPLY_VAR:
+                    op, slot = arg
+                    values[-1] = op(values[-1], (global_frame if slot[0] else frame).vals[slot[1]])
+                elif code == APPLY_CONST:
+                    values[-1] = arg[0](values[-1], arg[1])
+                elif code == APPLY:
+                    right = pop()
+                    values[-1] = arg(values[-1], right)
+                elif code == STORE:
+                    value = pop()
+                    if arg is not None:
+                        (global_frame if arg[0] else frame).vals[arg[1]] = value
+                elif code == WHILE_TEST:
+                    if pop():
+                        push_work((WHILE, arg))
+                        push_work(arg.instruction)
+                elif code == WHILE:
+                    push_work((WHILE_TEST, arg))
+                    push_work(arg.condition)
+                elif code == BRANCH:
+                    if pop():
+                        push_work(arg.instruction)
+                    elif arg.instruction_else is not None:
+                        push_work(arg.instruction_else)
+                elif code == DISCARD:
+                    pop()
+                elif code == CALL:
+                    fun, nargs = arg
+                    push_work((FRAME, frame))
+                    push_work(fun.instr)
+                    frame = Frame(fun.id, fun.frame_size, global_frame)
+                    if nargs:
+                        frame.vals[:nargs] = values[-nargs:]
+                        del values[-nargs:]
+                elif code == FRAME:  # function body completed without return
+                    frame = arg
+                    push(None)
+                elif code == RETURN:
+                    marker = self.unwind(())
+                    if marker is not None and marker[0] == FRAME:
+                        frame = marker[1]
+                    else:
+                        pop()  # return outside function ends the top level construction, its value is dropped
+                elif code == PRINT:
+                    emit(pop())
+                elif code == REPEAT:
+                    push_work((REPEAT_TEST, arg))
+                    push_work(arg.condition)
+                elif code == REPEAT_TEST:
+                    if not pop():
+                        push_work((REPEAT, arg))
+                        push_work(arg.instructions)
+                # TOP reached normally needs nothing
+            elif cls is AST.Variable:
+                slot = item.slot
+                push((global_frame if slot[0] else frame).vals[slot[1]] if slot is not None else None)
+            elif cls is AST.BinExpr:
+                # constant or variable right operand is applied directly, without being scheduled on its own
+                right = item.right
+                if right.__class__ is AST.Integer:
+                    push_work((APPLY_CONST, (ops[item.op], int(right.value))))
+                elif right.__class__ is AST.Variable and right.slot is not None:
+                    push_work((APPLY_VAR, (ops[item.op], right.slot)))
+                else:
+                    push_work((APPLY, ops[item.op]))
+                    push_work(right)
+                push_work(item.left)
+            elif cls is AST.Integer:
+                push(int(item.value))
+            elif cls is AST.Instruction:
+                instruction = item.instruction
+                if isinstance(instruction, expression_nodes):
+                    push_work((DISCARD, None))
+                push_work(instruction)
+            elif cls is AST.InstructionList or cls is AST.DeclarationList or cls is AST.ConstructionList:
+                work.extend(reversed(item.list))
+            elif cls is AST.Assignment:
+                push_work((STORE, item.slot))
+                push_work(item.expression)
+            elif cls is AST.Condition:
+                push_work(item.expression)
+            elif cls is AST.ChoiceInstr:
+                push_work((BRANCH, item))
+                push_work(item.condition)
+            elif cls is AST.WhileInstr:
+                push_work((WHILE_TEST, item))
+                push_work(item.condition)
+            elif cls is AST.Funcall:
+                fun = self.functions[item.id]
+                args = item.args.list
+                push_work((CALL, (fun, len(args))))
+                work.extend(reversed(args))
+            elif cls is AST.ReturnInstr:
+                push_work((RETURN, None))
+                push_work(item.expression)
+            elif cls is AST.CompoundInstr:
+                # block variables have their own slots in the enclosing frame, no frame is pushed here
+                push_work(item.instructions)
+                push_work(item.declarations)
+            elif cls is AST.Init:
+                push_work((STORE, (0, item.slot[1])))
+                push_work(item.expr)
+            elif cls is AST.Declaration:
+                work.extend(reversed(item.value.list))
+            elif cls is AST.PrintInstr:
+                push_work((PRINT, None))
+                push_work(item.expression)
+            elif cls is AST.Float:
+                push(float(item.value))
+            elif cls is AST.String:
+                push(str(item.value[1:-1]))
+            elif cls is AST.RepeatInstr:
+                push_work((REPEAT, item))
+                push_work(item.instructions)
+            elif cls is AST.BreakInstr or cls is AST.ContinueInstr:
+                marker = self.unwind(loop_markers)
+                if marker is None or marker[0] == TOP:
+                    pass
+                elif marker[0] == FRAME:  # outside a loop, rejected by TypeChecker
+                    frame = marker[1]
+                    push(None)
+                elif cls is AST.ContinueInstr:
+                    push_work(marker)
+            elif cls is AST.Construction or cls is AST.LabeledInstr:
+                push_work(item.code if cls is AST.Construction else item.instruction)
+            elif cls is AST.Fundef:
+                self.functions[item.id] = item
+            elif item is not None:
+                work.extend(reversed(item.children))
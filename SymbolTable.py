@@ -6,8 +6,11 @@ class Symbol(object):
 
 class VariableSymbol(Symbol):
 
-    def __init__(self, name, type):
-        pass
+    def __init__(self, name, type, level=0, slot=None):
+        self.name = name
+        self.type = type
+        self.level = level  # nesting level of the frame holding the variable, 0 - global
+        self.slot = slot    # index of the variable in its frame
     #
 
 
@@ -27,7 +30,7 @@ class SymbolTable(object):
         global_scope = self
         while global_scope.getParentScope() is not None:
             global_scope = global_scope.getParentScope()
-        if global_scope.shallowGet(name) is None or isinstance(global_scope.shallowGet(name), str):
+        if global_scope.shallowGet(name) is None or isinstance(global_scope.shallowGet(name), (str, VariableSymbol)):
             if self.shallowGet(name) is None:
                 self.symbols[name] = symbol
             else:
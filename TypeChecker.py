@@ -4,6 +4,9 @@ from SymbolTable import Symbol, SymbolTable, VariableSymbol, FunError
 
 
 class NodeVisitor(object):
+    # visits children recursively, so statements nested deeper than about 750 levels (if and while with blocks)
+    # exceed the recursion limit set in Interpreter.py; binary expression chains, which nest far deeper in real
+    # programs, are walked iteratively by visitors which have to
     def visit(self, node):
         method = 'visit_' + node.__class__.__name__
         visitor = getattr(self, method, self.generic_visit)
@@ -24,9 +27,13 @@ class NodeVisitor(object):
 
 
 class TypeChecker(NodeVisitor):
+    # ttype is a read-only table shared by all instances, checking state is kept per instance
     ttype = {}
-    isValid = True
-    loop = []
+
+    def __init__(self):
+        self.isValid = True
+        self.loop = []
+        self.symbols = None
 
     # operatory arytmetyczne i binarne
     ttype['+'] = {}
@@ -97,11 +104,25 @@ class TypeChecker(NodeVisitor):
     ttype['!=']['string'] = {'string': 'string'}
 
     def visit_BinExpr(self, node):
-        # alternative usage,
-        # requires definition of accept method in class Node
-        type1 = self.visit(node.left)  # type1 = node.left.accept(self)
-        type2 = self.visit(node.right)  # type2 = node.right.accept(self)
+        # operands being BinExprs themselves are checked with an explicit stack instead of recursion, so long
+        # chains like a+a+...+a fit in the python stack; errors come in the same order as from recursive visits
+        types = []
+        stack = [(node, False)]
+        while stack:
+            expr, checked = stack.pop()
+            if checked:
+                type2 = types.pop()
+                type1 = types.pop()
+                types.append(self.binexpr_type(expr, type1, type2))
+            elif expr.__class__ is AST.BinExpr:
+                stack.append((expr, True))
+                stack.append((expr.right, False))
+                stack.append((expr.left, False))
+            else:
+                types.append(self.visit(expr))
+        return types[0]
 
+    def binexpr_type(self, node, type1, type2):  # type of BinExpr <node> with operands of <type1> and <type2>
         op = node.op
         if op in self.ttype:
             if type1 in self.ttype[op]:
@@ -124,6 +145,8 @@ class TypeChecker(NodeVisitor):
         return self.symbols.get(node.value)
 
     def visit_Program(self, node):
+        self.isValid = True
+        self.loop = []
         self.symbols = SymbolTable(None, 'global')
         self.generic_visit(node)
         return self.isValid
@@ -0,0 +1,84 @@
+from Compiler import *
+
+
+class VM(object):
+    # stack machine executing Bytecode produced by Compiler
+
+    def __init__(self, output=None):  # output - sink of printed values (Output.py), None - builtin print
+        self.output = output
+
+    def run(self, bytecode):
+        try:
+            self.execute(bytecode)
+        finally:
+            if self.output is not None:
+                self.output.flush()
+
+    def execute(self, bytecode):
+        emit = print if self.output is None else self.output.print
+        functions = bytecode.functions
+        globals_ = [None] * bytecode.nglobals
+        code = bytecode.main
+        ops = code.code
+        consts = code.consts
+        locals_ = globals_
+        stack = []
+        frames = []  # (ops, consts, return pc, locals) of suspended callers
+        push = stack.append
+        pop = stack.pop
+        pc = 0
+
+        while True:
+            op = ops[pc]
+            if op == LOAD_LOCAL:
+                push(locals_[ops[pc + 1]])
+                pc += 2
+            elif op == LOAD_CONST:
+                push(consts[ops[pc + 1]])
+                pc += 2
+            elif op == BINARY_OP:
+                right = pop()
+                stack[-1] = binop_funs[ops[pc + 1]](stack[-1], right)
+                pc += 2
+            elif op == LOAD_GLOBAL:
+                push(globals_[ops[pc + 1]])
+                pc += 2
+            elif op == STORE_LOCAL:
+                locals_[ops[pc + 1]] = pop()
+                pc += 2
+            elif op == JUMP_IF_FALSE:
+                if pop():
+                    pc += 2
+                else:
+                    pc = ops[pc + 1]
+            elif op == JUMP:
+                pc = ops[pc + 1]
+            elif op == STORE_GLOBAL:
+                globals_[ops[pc + 1]] = pop()
+                pc += 2
+            elif op == CALL:
+                fun = functions[ops[pc + 1]]
+                nargs = ops[pc + 2]
+                frames.append((ops, consts, pc + 3, locals_))
+                if nargs:
+                    locals_ = stack[-nargs:]
+                    del stack[-nargs:]
+                else:
+                    locals_ = []
+                if fun.nlocals > nargs:
+                    locals_.extend([None] * (fun.nlocals - nargs))
+                ops = fun.code
+                consts = fun.consts
+                pc = 0
+            elif op == RETURN:
+                ops, consts, pc, locals_ = frames.pop()
+            elif op == PRINT:
+                emit(pop())
+                pc += 1
+            elif op == POP:
+                pop()
+                pc += 1
+            elif op == HALT:
+                return
+            else:
+                raise ValueError('Unknown opcode {0} at {1}'.format(op, pc))
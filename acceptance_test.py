@@ -1,9 +1,33 @@
 #!/usr/bin/env python
+import io
 import filecmp
 import unittest
+import contextlib
+import threading
+import tempfile
 import os
+from scanner import Scanner
+from FastScanner import FastScanner
+from ParseTables import cached_parser, grammar_hash
+from Cparser import Cparser
+from Resolver import Resolver
+from Serialization import encode, decode, slots, node_classes
+from RunStats import RunStats
+from batch import run_parallel
+from TypeChecker import TypeChecker
+from OptimizationPass1 import OptimizationPass1
+from ProgramCache import ProgramCache, STATS_FILE
+from CodeGenerator import CodeCache, PythonInterpreter
+from Output import NullSink
+from main import frontend, run
+import AST
 
 class AcceptanceTests(unittest.TestCase):
+    backends = ['vm', 'closure', 'stack', 'python', 'c']
+    variants = {'optimized': '--optimize', 'memoized': '--memoize', 'streamed': '--stream',
+                'fast_lexer': '--fast-lexer', 'profiled': '--profile', 'buffered': '--output buffered',
+                'stats': '--stats'}
+    batch_dirs = {}
 
     @classmethod
     def add_test(cls, dirpath, filename):
@@ -24,6 +48,138 @@ class AcceptanceTests(unittest.TestCase):
         func_name = file2func_name(name)
         setattr(cls, func_name, test_func)
 
+        for backend in cls.backends:
+            cls.add_backend_test(name, filename, backend)
+        for variant, options in cls.variants.items():
+            cls.add_variant_test(name, filename, variant, options)
+        cls.add_lexer_test(name, filename)
+        cls.add_cache_test(name, filename)
+        SerializationTests.add_program_test(name, filename)
+        cls.add_batch_test(name, 'batch', '')
+        cls.add_batch_test(name, 'parallel', '--jobs 4 --threads')
+        cls.add_batch_test(name, 'processes', '--jobs 4')
+
+    @classmethod
+    def add_backend_test(cls, name, filename, backend):
+        # output of other backends is compared against expected output without overwriting .actual files
+        def test_func(self):
+            actual = os.popen("python3 main.py --backend {0} tests/{1}".format(backend, filename)).read()
+            with open("tests/{0}.expected".format(name)) as expected:
+                self.assertEqual(actual, expected.read(), "{0} output differs from {1}.expected".format(backend, name))
+
+        setattr(cls, 'test_{0}_{1}'.format(name, backend), test_func)
+
+    @classmethod
+    def add_variant_test(cls, name, filename, variant, options):
+        # program run with extra main.py <options> (e.g. optimizations) has to print the same expected output
+        def test_func(self):
+            actual = os.popen("python3 main.py {0} tests/{1}".format(options, filename)).read()
+            with open("tests/{0}.expected".format(name)) as expected:
+                self.assertEqual(actual, expected.read(), "{0} output differs from {1}.expected".format(variant, name))
+
+        setattr(cls, 'test_{0}_{1}'.format(name, variant), test_func)
+
+    @classmethod
+    def add_cache_test(cls, name, filename):
+        # second run takes the program from the cache (the first one may too), both print the expected output
+        def test_func(self):
+            with open("tests/{0}.expected".format(name)) as expected:
+                expected = expected.read()
+            for run in ['first', 'second']:
+                actual = os.popen("python3 main.py --ast-cache tests/{0}".format(filename)).read()
+                self.assertEqual(actual, expected, "{0} cached run output differs from {1}.expected".format(run, name))
+
+        setattr(cls, 'test_{0}_cached'.format(name), test_func)
+
+    @classmethod
+    def add_lexer_test(cls, name, filename):
+        # FastScanner has to produce the same tokens as Scanner, columns of all of them included
+        def tokens(scanner):
+            scanner.build()
+            with open("tests/{0}".format(filename)) as file:
+                scanner.input(file.read())
+            result = []
+            tok = scanner.token()
+            while tok is not None:
+                result.append((tok.type, tok.value, tok.lineno, tok.lexpos, scanner.find_tok_column(tok)))
+                tok = scanner.token()
+            return result
+
+        def test_func(self):
+            self.assertEqual(tokens(FastScanner()), tokens(Scanner()), "FastScanner tokens of {0} differ".format(name))
+
+        setattr(cls, 'test_{0}_lexer'.format(name), test_func)
+
+    @classmethod
+    def add_batch_test(cls, name, mode, options):
+        # whole tests/ directory is run once by batch.py in each mode, each output is checked separately
+        def test_func(self):
+            if mode not in AcceptanceTests.batch_dirs:
+                AcceptanceTests.batch_dirs[mode] = tempfile.mkdtemp()
+                os.system("python3 batch.py {0} --output-dir {1} tests/".format(options, AcceptanceTests.batch_dirs[mode]))
+            res = filecmp.cmp(os.path.join(AcceptanceTests.batch_dirs[mode], name + ".actual"),
+                              "tests/{0}.expected".format(name), shallow=False)
+            self.assertTrue(res, "{0} output of {1} and {1}.expected differ".format(mode, name))
+
+        setattr(cls, 'test_{0}_{1}'.format(name, mode), test_func)
+
+    def test_run_parallel(self):
+        # programs run on a pool of worker processes, outputs come back in order
+        names = ['fact', 'fib', 'loops']
+        texts, expected = [], []
+        for name in names:
+            with open("tests/{0}.in".format(name)) as source, open("tests/{0}.expected".format(name)) as output:
+                texts.append(source.read())
+                expected.append(output.read())
+        self.assertEqual(run_parallel(texts, jobs=3), expected)
+        # on threads with a large stack, which is set only while workers start
+        previous = threading.stack_size()
+        self.assertEqual(run_parallel(texts, jobs=3, threads=True), expected)
+        self.assertEqual(threading.stack_size(), previous)
+
+    def test_deep_expression_optimized(self):
+        # optimization passes walk a 50000-term a+a+...+a (and a*1*...*a*1) without recursion
+        for expression, value in [('+'.join(['a'] * 50000), 50000), ('*'.join(['a*1'] * 20000) + ' | 0', 1)]:
+            with tempfile.NamedTemporaryFile('w', suffix='.in', delete=False) as file:
+                file.write("int a = 1;\nprint {0};\n".format(expression))
+            actual = os.popen("python3 main.py -O -b stack {0}".format(file.name)).read()
+            os.remove(file.name)
+            self.assertEqual(actual, "{0}\n".format(value))
+
+    def test_deep_statements(self):
+        # statements are visited recursively: 500 levels of ifs and blocks run on every backend and optimized
+        program = "int a = 1;\n" + "if (a > 0) {\n{\n" * 250 + "print a;\n" + "}\n}\n" * 250
+        with tempfile.NamedTemporaryFile('w', suffix='.in', delete=False) as file:
+            file.write(program)
+        try:
+            for options in ['-b ' + backend for backend in ['interpreter'] + self.backends] + ['-O']:
+                actual = os.popen("python3 main.py {0} {1} 2>&1".format(options, file.name)).read()
+                self.assertEqual(actual, "1\n", options)
+        finally:
+            os.remove(file.name)
+
+    def test_deadcode_report(self):
+        # --report implies --optimize and lists kept write-only variables along with removed code
+        report = os.popen("python3 main.py --report tests/deadcode.in 2>&1 >/dev/null").read().splitlines()
+        self.assertIn("line 19: write-only variable 'count'", report)
+        self.assertIn("line 20: write-only variable 'kept' kept, its initialization may have an effect", report)
+        self.assertIn("line 3: function 'unused' never called", report)
+
+    def test_native_fallback(self):
+        # output of the executable is passed on as printed: a program overflowing 64 bits goes on in python
+        # without printing its first lines twice, one dividing by zero raises as in python
+        overflow = "int a = 1;\nprint a;\nwhile (a < 1000000000000) {\n  a = a * 1000;\n}\nprint a * a;\n"
+        division = "int a = 0;\nprint 1;\nprint 2 / a;\n"
+        outputs = []
+        for program in [overflow, division]:
+            with tempfile.NamedTemporaryFile('w', suffix='.in', delete=False) as file:
+                file.write(program)
+            outputs.append(os.popen("python3 main.py -b c {0} 2>&1".format(file.name)).read())
+            os.remove(file.name)
+        self.assertEqual(outputs[0], "1\n1000000000000000000000000\n")
+        self.assertTrue(outputs[1].startswith("1\n"))
+        self.assertEqual(outputs[1].splitlines()[-1], "ZeroDivisionError: division by zero")
+
     @classmethod
     def add_tests(cls, dir):
         for dirpath, dirnames, filenames in os.walk(dir):
@@ -33,6 +189,184 @@ class AcceptanceTests(unittest.TestCase):
                 elif filename.endswith('.in'):
                     cls.add_test(dirpath,filename)
 
+
+class SerializationTests(unittest.TestCase):
+    # encode/decode round trip of every node class and of every test program, before and after Resolver
+    samples = [AST.Integer('1', 7), 'name', 12, (0, 3), None, True, -2.5, [AST.Variable('x', -1), 'x', 2 ** 70]]
+
+    def assertSameTree(self, a, b, path='tree'):
+        self.assertIs(a.__class__, b.__class__, path)
+        if isinstance(a, AST.Node):
+            for name in slots(a.__class__):
+                self.assertEqual(hasattr(a, name), hasattr(b, name), path + '.' + name)
+                if hasattr(a, name):
+                    self.assertSameTree(getattr(a, name), getattr(b, name), path + '.' + name)
+        elif isinstance(a, (list, tuple)):
+            self.assertEqual(len(a), len(b), path)
+            for i, (x, y) in enumerate(zip(a, b)):
+                self.assertSameTree(x, y, '{0}[{1}]'.format(path, i))
+        else:
+            self.assertEqual(a, b, path)
+
+    @classmethod
+    def add_node_test(cls, node_class):
+        def test_func(self):
+            empty = node_class.__new__(node_class)
+            self.assertSameTree(decode(encode(empty)), empty)
+            full = node_class.__new__(node_class)
+            for i, name in enumerate(slots(node_class)):
+                setattr(full, name, self.samples[i % len(self.samples)])
+            self.assertSameTree(decode(encode(full)), full)
+            self.assertSameTree(decode(encode([full, full])), [full, full])
+
+        setattr(cls, 'test_{0}_round_trip'.format(node_class.__name__), test_func)
+
+    @classmethod
+    def add_program_test(cls, name, filename):
+        def test_func(self):
+            cparser, parser, _ = cached_parser()
+            with open("tests/{0}".format(filename)) as file:
+                ast = parser.parse(file.read(), lexer=cparser.scanner)
+            self.assertSameTree(decode(encode(ast)), ast)
+            ast.accept(Resolver())
+            self.assertSameTree(decode(encode(ast)), ast)
+
+        setattr(cls, 'test_{0}_round_trip'.format(name), test_func)
+
+    def test_deep_nesting(self):
+        # far deeper than the recursion limit, walked back iteratively
+        ast = AST.Integer('1', 1)
+        for i in range(100000):
+            ast = AST.BinExpr('+', ast, AST.Variable('a', i), i)
+        node = decode(encode(ast))
+        for i in reversed(range(100000)):
+            self.assertIs(node.__class__, AST.BinExpr)
+            self.assertEqual((node.line, node.right.name, node.right.line), (i, 'a', i))
+            node = node.left
+        self.assertSameTree(node, AST.Integer('1', 1))
+
+    def test_header(self):
+        with self.assertRaises(ValueError):
+            decode(b'not an encoded tree')
+        with self.assertRaises(TypeError):
+            encode(object())
+
+
+class OptimizationTests(unittest.TestCase):
+    # identities are simplified on variables unless they may hold a comparison result (a bool)
+
+    def test_variable_identities(self):
+        text = ("int v = 7;\nint c = 1 < 2;\nint d = c;\nint q = v / 2;\n"
+                "int g(int a) { return a * 1; }\nint h(int a) { return a - 0; }\n"
+                "print v * 1;\nprint v + 0;\nprint c * 1;\nprint d - 0;\nprint q * 1;\nprint q + 0;\n"
+                "print g(1 < 2);\nprint h(v);\n")
+        cparser, parser, _ = cached_parser()
+        ast = parser.parse(text, lexer=cparser.scanner)
+        self.assertTrue(ast.accept(TypeChecker()))
+        optimization = OptimizationPass1()
+        ast.accept(optimization)
+        # v * 1, v + 0, q * 1 (not q + 0, q holds a float) and a - 0 in h
+        self.assertEqual(optimization.simplified, 4)
+
+
+class ProgramCacheTests(unittest.TestCase):
+
+    def test_totals_saved_at_exit(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ProgramCache(directory)
+            self.assertIsNone(cache.load('print 1;'))
+            cache.store('print 1;', AST.Integer('1', 1))
+            self.assertIsNotNone(cache.load('print 1;'))
+            self.assertFalse(os.path.exists(os.path.join(directory, STATS_FILE)))
+            cache.save_totals()
+            self.assertEqual(ProgramCache(directory).totals(), {'hits': 1, 'misses': 1})
+
+    def test_stale_temporary_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            stale, fresh = os.path.join(directory, 'stale.tmp'), os.path.join(directory, 'fresh.tmp')
+            for path in (stale, fresh):
+                open(path, 'w').close()
+            os.utime(stale, (0, 0))
+            ProgramCache(directory).store('print 1;', AST.Integer('1', 1))
+            self.assertEqual((os.path.exists(stale), os.path.exists(fresh)), (False, True))
+
+    def test_unwritable_directory(self):
+        # cache directory cannot be created below a file: lookups miss, nothing is stored, nothing fails
+        with tempfile.NamedTemporaryFile() as file:
+            cache = ProgramCache(os.path.join(file.name, 'cache'))
+            self.assertFalse(cache.store('print 1;', AST.Integer('1', 1)))
+            self.assertIsNone(cache.load('print 1;'))
+            cache.save_totals()
+            self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_code_cache(self):
+        # a program run by the python backend is cached under its text and optimization flag, with its messages
+        text = 'int a = 2;\nprint a * 3;\n'
+        with tempfile.TemporaryDirectory() as directory:
+            cache = CodeCache(directory)
+            cparser, parser, _ = cached_parser()
+            ast, valid = frontend(parser, cparser, None, text)
+            ast.accept(PythonInterpreter(NullSink(), lambda code: cache.store(text, False, code, 'warning\n')))
+            self.assertIsNone(cache.load(text, optimized=True))
+            code, messages = cache.load(text)
+            self.assertEqual(messages, 'warning\n')
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                PythonInterpreter().execute(code)
+            self.assertEqual(output.getvalue(), '6\n')
+
+
+class GrammarHashTests(unittest.TestCase):
+    # cached tables are keyed on rules in definition order and on the start symbol, both of which ply depends on
+
+    def test_rule_order(self):
+        key = grammar_hash()
+        first, second = Cparser.p_program, Cparser.p_constructions
+        codes = first.__code__, second.__code__
+        try:
+            first.__code__ = codes[0].replace(co_firstlineno=codes[1].co_firstlineno)
+            second.__code__ = codes[1].replace(co_firstlineno=codes[0].co_firstlineno)
+            self.assertNotEqual(grammar_hash(), key)
+        finally:
+            first.__code__, second.__code__ = codes
+        self.assertEqual(grammar_hash(), key)
+
+    def test_start(self):
+        key = grammar_hash()
+        Cparser.start = 'constructions'
+        try:
+            self.assertNotEqual(grammar_hash(), key)
+        finally:
+            del Cparser.start
+        self.assertEqual(grammar_hash(), key)
+
+
+class RunStatsTests(unittest.TestCase):
+    # counters of --stats on tests/fact.in: fact runs for 0, 1, 10 and 20 (32 calls), fact2 twice
+
+    def test_counters(self):
+        cparser, parser, _ = cached_parser()
+        with open("tests/fact.in") as file:
+            text = file.read()
+        stats = RunStats()
+        with contextlib.redirect_stdout(io.StringIO()):
+            ast, valid = frontend(parser, cparser, None, text, stats)
+            self.assertTrue(valid)
+            run(ast, stats=stats)
+        scanner = Scanner()
+        scanner.build()
+        scanner.input(text)
+        self.assertEqual(stats.counters['tokens'], len(list(iter(scanner.token, None))))
+        self.assertEqual(stats.counters['symbol table scopes'], 3)
+        self.assertEqual(stats.counters['function calls'], 34)
+        self.assertEqual(stats.counters['frames pushed'], 35)
+        self.assertEqual((stats.nodes['Program'], stats.nodes['Fundef'], stats.nodes['PrintInstr']), (1, 2, 6))
+        self.assertEqual([phase[0] for phase in stats.phases], ['parsing', 'type checking'])
+
+
+for node_class in node_classes:
+    SerializationTests.add_node_test(node_class)
+
 if __name__ == '__main__':
     AcceptanceTests.add_tests('tests/')
     unittest.main()
\ No newline at end of file
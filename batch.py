@@ -0,0 +1,197 @@
+import io
+import os
+import sys
+import argparse
+import threading
+import contextlib
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from TypeChecker import TypeChecker
+from ParseTables import cached_parser
+from main import run, backends
+
+
+class BatchRunner(object):
+    # runs many programs in one process, reusing lexer and parser tables built once;
+    # every program gets a fresh TypeChecker and interpreter, its output goes to its own file
+
+    def __init__(self, backend='interpreter', output_dir=None, suffix='.actual'):
+        self.cparser, self.parser, _ = cached_parser()
+        self.backend = backend
+        self.output_dir = output_dir
+        self.suffix = suffix
+
+    def output_path(self, filename):
+        return output_path(filename, self.output_dir, self.suffix)
+
+    def execute(self, text):  # parses, checks and runs <text>, output goes to current sys.stdout
+        lexer = self.cparser.scanner.lexer
+        lexer.lineno = 1
+        ast = self.parser.parse(text, lexer=self.cparser.scanner)
+        if ast.accept(TypeChecker()):
+            run(ast, self.backend)
+
+    def run_file(self, filename):  # returns path of the output file, None if program failed
+        output = self.output_path(filename)
+        with open(filename, "r") as file:
+            text = file.read()
+        with open(output, "w") as out, contextlib.redirect_stdout(out):
+            try:
+                self.execute(text)
+            except Exception:
+                traceback.print_exc(file=sys.stderr)
+                print("{0}: program failed, see stderr".format(filename), file=sys.stderr)
+                return None
+        return output
+
+
+def output_path(filename, output_dir=None, suffix='.actual'):
+    # output file of source <filename>: its name with <suffix> for .in, in <output_dir> or next to the source
+    base = os.path.splitext(filename)[0] + suffix
+    if output_dir is None:
+        return base
+    return os.path.join(output_dir, os.path.basename(base))
+
+
+class ThreadStdout(object):
+    # sys.stdout replacement sending writes of each thread to that thread's buffer while one is set
+
+    def __init__(self, stdout):
+        self.stdout = stdout
+        self.local = threading.local()
+
+    def target(self):
+        buffer = getattr(self.local, 'buffer', None)
+        return self.stdout if buffer is None else buffer
+
+    def write(self, text):
+        return self.target().write(text)
+
+    def flush(self):
+        self.target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self.target(), name)
+
+
+# deep recursion of interpreted programs needs more than the default thread stack
+THREAD_STACK_SIZE = 64 * 1024 * 1024
+
+_local = threading.local()
+_stdout_lock = threading.Lock()
+
+
+def _thread_stdout():
+    with _stdout_lock:
+        if not isinstance(sys.stdout, ThreadStdout):
+            sys.stdout = ThreadStdout(sys.stdout)
+        return sys.stdout
+
+
+def run_source(text, backend='interpreter'):
+    # runs program <text> with a runner owned by the calling thread (or worker process), returns its output
+    runner = getattr(_local, 'runner', None)
+    if runner is None or runner.backend != backend:
+        runner = _local.runner = BatchRunner(backend)
+    stdout = _thread_stdout()
+    stdout.local.buffer = io.StringIO()
+    try:
+        runner.execute(text)
+        return stdout.local.buffer.getvalue()
+    finally:
+        stdout.local.buffer = None
+
+
+class StackThreadPoolExecutor(ThreadPoolExecutor):
+    # thread pool whose workers get <stack_size> bytes of stack. threading.stack_size is process-wide and the
+    # pool starts workers as tasks are submitted, so it is set only while a worker starts and restored after
+
+    def __init__(self, max_workers=None, stack_size=THREAD_STACK_SIZE):
+        super().__init__(max_workers)
+        self.stack_size = stack_size
+
+    def _adjust_thread_count(self):
+        previous = threading.stack_size(self.stack_size)
+        try:
+            super()._adjust_thread_count()
+        finally:
+            threading.stack_size(previous)
+
+
+def executor(jobs=None, threads=False):  # pool for running independent programs in parallel
+    if threads:
+        return StackThreadPoolExecutor(jobs)
+    return ProcessPoolExecutor(jobs)
+
+
+def run_parallel(texts, backend='interpreter', jobs=None, threads=False):
+    # runs independent programs <texts> on <jobs> worker processes (or threads), returns list of their outputs;
+    # exception of a failed program is raised here
+    texts = list(texts)
+    with executor(jobs, threads) as pool:
+        return list(pool.map(run_source, texts, [backend] * len(texts)))
+
+
+def sources(paths, stream=sys.stdin):
+    # yields source files from <paths>: files, directories (their *.in files) or '-' for
+    # newline-delimited file names read from <stream> as they arrive
+    for path in paths:
+        if path == '-':
+            for line in stream:
+                line = line.strip()
+                if line:
+                    yield line
+        elif os.path.isdir(path):
+            for filename in sorted(os.listdir(path)):
+                if filename.endswith('.in') and not filename.startswith('.'):
+                    yield os.path.join(path, filename)
+        else:
+            yield path
+
+
+if __name__ == '__main__':
+
+    argparser = argparse.ArgumentParser(description="Run many programs in a single process.")
+    argparser.add_argument('paths', nargs='*', default=['-'],
+                           help="source files, directories with *.in files or - to read file names from stdin")
+    argparser.add_argument('-b', '--backend', choices=backends, default='interpreter')
+    argparser.add_argument('-o', '--output-dir', help="directory for output files (default: next to sources)")
+    argparser.add_argument('--suffix', default='.actual', help="extension replacing .in in output file names")
+    argparser.add_argument('-j', '--jobs', type=int, default=1, help="number of programs run in parallel")
+    argparser.add_argument('--threads', action='store_true', help="run parallel jobs on threads instead of processes")
+    args = argparser.parse_args()
+
+    if args.output_dir is not None:
+        os.makedirs(args.output_dir, exist_ok=True)
+    failed = 0
+    if args.jobs > 1:
+        with executor(args.jobs, args.threads) as pool:
+            futures = []
+            for filename in sources(args.paths):
+                try:
+                    with open(filename, "r") as file:
+                        futures.append((filename, pool.submit(run_source, file.read(), args.backend)))
+                except IOError:
+                    print("Cannot open {0} file".format(filename), file=sys.stderr)
+                    failed += 1
+            for filename, future in futures:
+                try:
+                    output = future.result()
+                except Exception:
+                    traceback.print_exc(file=sys.stderr)
+                    print("{0}: program failed, see stderr".format(filename), file=sys.stderr)
+                    failed += 1
+                    continue
+                with open(output_path(filename, args.output_dir, args.suffix), "w") as out:
+                    out.write(output)
+    else:
+        # workers build their own runners, tables are loaded here only when programs run in this process
+        runner = BatchRunner(args.backend, args.output_dir, args.suffix)
+        for filename in sources(args.paths):
+            try:
+                if runner.run_file(filename) is None:
+                    failed += 1
+            except IOError:
+                print("Cannot open {0} file".format(filename), file=sys.stderr)
+                failed += 1
+    sys.exit(1 if failed else 0)
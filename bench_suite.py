@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import ply.yacc as yacc
+from TypeChecker import TypeChecker
+from Interpreter import Interpreter
+from Output import NullSink
+from ParseTables import cached_parser
+from batch import sources
+from benchmark import measure, lex_all, straight_line, generated, NON_TAIL
+
+# Benchmark suite: times every phase of the front end and the interpreter separately on a fixed set of workloads
+# and writes the results as json, so a later run can be compared against them (--compare) to find regressions.
+# Parsing pulls tokens from the scanner, so parse time includes a second scan; scan time alone is measured
+# first. Every phase is timed by benchmark.measure; printed output of the interpreter goes to a NullSink,
+# messages of TypeChecker are dropped along with the rest of stdout.
+
+PHASES = ['scan', 'parse', 'typecheck', 'interpret']
+
+# bump when meaning of results changes (workloads, phases), results of different versions are not compared
+SUITE_VERSION = 1
+
+TESTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tests')
+
+# phase times slower than the baseline by more than THRESHOLD times are regressions, unless both are below
+# MIN_TIME seconds, where timer resolution and noise dominate
+THRESHOLD = 1.25
+MIN_TIME = 1e-3
+
+HOT_LOOP = """
+int i = 0, acc = 0;
+while(i < %d) {
+    acc = (acc + i * 3) %% 1000;
+    i = i + 1;
+}
+print acc;
+"""
+
+
+def deep_expression(depth):  # program printing an expression nested in <depth> parentheses
+    return "int a = 1;\nprint " + "(a + " * depth + "1" + ")" * depth + ";\n"
+
+
+def generated_workloads():
+    return [
+        ('deep expression', deep_expression(1000)),
+        ('many functions', generated(500, 10)),
+        ('straight line', straight_line(20000)),
+        ('hot loop', HOT_LOOP % 100000),
+        ('deep recursion', NON_TAIL % 500),
+    ]
+
+
+def workloads(tests_dir=TESTS_DIR):  # (name, source) of test programs of <tests_dir> and of generated programs
+    result = []
+    for path in sources([tests_dir]):
+        with open(path) as file:
+            result.append(('tests/' + os.path.basename(path), file.read()))
+    return result + generated_workloads()
+
+
+def measure_phases(cparser, parser, text, repeat=3):
+    # best time of every phase over <repeat> runs of program <text>, with the number of its tokens
+    scanner = cparser.scanner
+    result = {}
+
+    def scan():
+        scanner.lexer.lineno = 1
+        scanner.input(text)
+        result['tokens'] = lex_all(scanner)
+
+    def parse():
+        scanner.lexer.lineno = 1
+        result['ast'] = parser.parse(text, lexer=scanner)
+
+    def typecheck():
+        result['valid'] = result['ast'].accept(TypeChecker())
+
+    best = {'scan': measure(scan, repeat)[0], 'parse': measure(parse, repeat)[0],
+            'typecheck': measure(typecheck, repeat)[0]}
+    if not result['valid']:
+        raise ValueError("workload does not type check")
+    best['interpret'] = measure(lambda: result['ast'].accept(Interpreter(output=NullSink())), repeat)[0]
+    best['tokens'] = result['tokens']
+    return best
+
+
+def run_suite(repeat=3, only=None, tests_dir=TESTS_DIR, log=None):
+    # results of the suite as a json-ready dict; <only> - run workloads with this substring in their name only,
+    # <log> - file to print a line per workload to as it finishes
+    cparser, parser, _ = cached_parser()
+    results = {}
+    for name, text in workloads(tests_dir):
+        if only is not None and only not in name:
+            continue
+        results[name] = measure_phases(cparser, parser, text, repeat)
+        if log is not None:
+            print(row(name, results[name]), file=log)
+    return {'version': SUITE_VERSION, 'python': platform.python_version(), 'ply': yacc.__version__,
+            'machine': platform.machine(), 'repeat': repeat, 'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'workloads': results}
+
+
+def header():
+    return '{0:24} {1:>8} '.format('workload', 'tokens') + ' '.join('{0:>14}'.format(phase + ' [ms]')
+                                                                 for phase in PHASES)
+
+
+def row(name, result):
+    return '{0:24} {1:8} '.format(name, result['tokens']) + ' '.join('{0:14.3f}'.format(result[phase] * 1e3)
+                                                                     for phase in PHASES)
+
+
+def compare(baseline, results, threshold=THRESHOLD, min_time=MIN_TIME):
+    # (report lines, number of regressions) of <results> against <baseline>, both as returned by run_suite
+    if baseline.get('version') != results.get('version'):
+        raise ValueError("results of suite version {0} cannot be compared with version {1}".format(
+            baseline.get('version'), results.get('version')))
+    lines = ['{0:24} {1:>10} '.format('workload', 'phase') + '{0:>14} {1:>14} {2:>8}'.format('baseline [ms]',
+                                                                                       'current [ms]', 'ratio')]
+    regressions = 0
+    for name, result in results['workloads'].items():
+        old = baseline['workloads'].get(name)
+        if old is None:
+            continue
+        for phase in PHASES:
+            before, after = old[phase], result[phase]
+            ratio = after / before if before else float('inf')
+            regressed = ratio > threshold and max(before, after) >= min_time
+            regressions += regressed
+            lines.append('{0:24} {1:>10} {2:14.3f} {3:14.3f} {4:7.2f}x{5}'.format(
+                name, phase, before * 1e3, after * 1e3, ratio, '  REGRESSION' if regressed else ''))
+    return lines, regressions
+
+
+if __name__ == '__main__':
+
+    argparser = argparse.ArgumentParser(description="Time scanner, parser, type checker and interpreter "
+                                                    "on test programs and generated large programs.")
+    argparser.add_argument('-n', '--repeat', type=int, default=3, help="runs of every workload, best one counts")
+    argparser.add_argument('-o', '--output', default='bench_results.json',
+                           help="json file to write results to (default: %(default)s)")
+    argparser.add_argument('--compare', metavar='BASELINE',
+                           help="json results of an earlier run; exit status is 1 if any phase regressed")
+    argparser.add_argument('--threshold', type=float, default=THRESHOLD,
+                           help="slowdown ratio counted as a regression (default: %(default)s)")
+    argparser.add_argument('--only', help="run workloads with this text in their name only")
+    args = argparser.parse_args()
+
+    print(header())
+    results = run_suite(args.repeat, args.only, log=sys.stdout)
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        lines, regressions = compare(baseline, results, args.threshold)
+        print()
+        for line in lines:
+            print(line)
+        print('{0} regressions'.format(regressions))
+        sys.exit(1 if regressions else 0)
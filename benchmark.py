@@ -0,0 +1,642 @@
+#!/usr/bin/env python
+import gc
+import io
+import os
+import sys
+import time
+import pickle
+import tempfile
+import tracemalloc
+import contextlib
+import ply.yacc as yacc
+from Cparser import Cparser
+from scanner import Scanner
+from FastScanner import FastScanner
+from TypeChecker import TypeChecker, NodeVisitor
+from Interpreter import Interpreter
+from Compiler import Compiler
+from VM import VM
+from ClosureCompiler import ClosureInterpreter
+from StackInterpreter import StackInterpreter
+from CodeGenerator import PythonInterpreter
+from CCodeGenerator import NativeInterpreter, NativeCache
+from ParseTables import cached_parser
+from ProgramCache import ProgramCache
+from Serialization import encode, decode
+from Output import BufferedSink, MemorySink, NullSink
+from OptimizationPass1 import OptimizationPass1
+from OptimizationPass2 import OptimizationPass2
+from visit import on, when
+import AST
+
+
+FIB = """
+int fib(int n) {
+    if(n <= 1) {
+        return n;
+    }
+    return fib(n-1) + fib(n-2);
+}
+print fib(%d);
+"""
+
+
+TRIB = """
+int trib(int n) {
+    if(n <= 1) {
+        return 0;
+    }
+    if(n == 2) {
+        return 1;
+    }
+    return trib(n-1) + trib(n-2) + trib(n-3);
+}
+print trib(%d);
+"""
+
+
+FIB_ITER = """
+int fib_iter(int n) {
+    int a = 0, b = 1, sum = 0, i = 0;
+    while(i < (n-1)) {
+        sum = a + b;
+        a = b;
+        b = sum;
+        i = i+1;
+    }
+    return sum;
+}
+int i = 0;
+while(i < %d) {
+    fib_iter(200);
+    i = i + 1;
+}
+"""
+
+
+DEPTH = """
+int g = 1;
+int down(int n) {
+    if(n == 0) {
+        return 0;
+    }
+    return down(n-1) + g;
+}
+int i = 0;
+while(i < %d) {
+    down(%d);
+    i = i + 1;
+}
+"""
+
+
+CALLS = """
+int f(int n) {
+    return n;
+}
+int i = 0;
+while(i < %d) {
+    f(i);
+    i = i + 1;
+}
+"""
+
+
+NO_CALLS = """
+int i = 0;
+while(i < %d) {
+    i;
+    i = i + 1;
+}
+"""
+
+
+PRINTS = """
+int i = 0;
+while (i < %d) {
+    print i;
+    i = i + 1;
+}
+"""
+
+
+ARITH = """
+int SIZE = 4 * 8 + 32;
+float SCALE = 1.0 / (2 * 4);
+int i = 0, acc = 0;
+float total = 0.0;
+while(i < SIZE * 10 - 40) {
+    acc = (acc * 1 + i * (60 * 60 - 3600 + 1)) % (1 << 16 + 0);
+    total = total + i * SCALE * (2.5 - 0.5) / 2;
+    if(SIZE > 0 * 100) {
+        acc = (acc + 3 * 7 - 21) * 1;
+    }
+    if(1 > 2) {
+        acc = 0;
+    }
+    i = i + 1;
+}
+print acc;
+print total;
+"""
+
+
+GENERATED_FUNCTION = """
+int f%d(int n) {
+    int unused = n * 2, steps = 0;
+    while(n > 1) {
+        steps = steps + 1;
+        if(n %% 2 == 0) {
+            n = n / 2;
+            continue;
+            print "unreachable";
+        }
+        n = 3 * n + 1;
+    }
+    return n;
+    print "unreachable";
+    n = 0;
+}
+"""
+
+
+def generated(functions, called):  # <functions> generated functions, <called> of them called from a loop
+    text = "".join(GENERATED_FUNCTION % i for i in range(functions))
+    text += "int i = 0, total = 0;\nwhile(i < 20) {\n"
+    text += "".join("    total = total + f%d(i + %d);\n" % (i, i) for i in range(called))
+    return text + "    i = i + 1;\n}\nprint total;\n"
+
+
+TAIL = """
+int count(int n, int acc) {
+    if(n == 0) {
+        return acc;
+    }
+    return count(n-1, acc+1);
+}
+print count(%d, 0);
+"""
+
+
+NON_TAIL = """
+int count(int n) {
+    if(n == 0) {
+        return 0;
+    }
+    return 1 + count(n-1);
+}
+print count(%d);
+"""
+
+
+def straight_line(n):  # program of <n> top-level assignment statements
+    return "int x = 0;\n" + "x = x + 1;\n" * n
+
+
+workloads = [
+    ('fib(18)', FIB % 18),
+    ('trib(15)', TRIB % 15),
+    ('fib_iter x200', FIB_ITER % 200),
+]
+
+
+backends = [
+    ('interpreter', lambda ast: ast.accept(Interpreter())),
+    ('closure', lambda ast: ast.accept(ClosureInterpreter())),
+    ('vm', lambda ast: VM().run(ast.accept(Compiler()))),
+    ('stack', lambda ast: ast.accept(StackInterpreter())),
+    ('python', lambda ast: ast.accept(PythonInterpreter())),
+]
+
+
+def parse(text):
+    cparser = Cparser()
+    parser = yacc.yacc(module=cparser, debug=False, write_tables=False, errorlog=yacc.NullLogger())
+    ast = parser.parse(text, lexer=cparser.scanner)
+    if not ast.accept(TypeChecker()):
+        raise ValueError("benchmark program does not type check")
+    return ast
+
+
+def measure(fun, repeat=3):  # best wall time of <repeat> runs, stdout of the last one
+    best = None
+    for _ in range(repeat):
+        out = io.StringIO()
+        gc.collect()  # garbage of earlier (larger) runs is not collected while timing this one
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(out):
+            fun()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, out.getvalue()
+
+
+def lex_all(scanner):  # number of tokens left in <scanner>
+    count = 0
+    while scanner.token() is not None:
+        count += 1
+    return count
+
+
+def count_nodes(node):
+    if isinstance(node, AST.Node):
+        return 1 + sum(count_nodes(child) for child in (getattr(node, 'condition', None),) + node.children)
+    return 0
+
+
+# front end: parser construction, lexing, parsing, cached and serialized programs
+
+def bench_startup(repeat=3):
+    # parser construction: ply table build/validation vs tables loaded from a cold and a warm cache
+    print('{0:16} {1:>12}'.format('parser startup', 'time [ms]'))
+    timings = {'yacc.yacc': None, 'cached, cold': None, 'cached, warm': None}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cparser = Cparser()
+        yacc.yacc(module=cparser, debug=False, write_tables=False, errorlog=yacc.NullLogger())
+        timings['yacc.yacc'] = min(timings['yacc.yacc'] or 1e9, time.perf_counter() - start)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            for mode in ['cached, cold', 'cached, warm']:
+                start = time.perf_counter()
+                cached_parser(cache_dir)
+                timings[mode] = min(timings[mode] or 1e9, time.perf_counter() - start)
+    for mode, elapsed in timings.items():
+        print('{0:16} {1:12.2f}'.format(mode, elapsed * 1e3))
+
+
+def bench_parse(sizes=(1000, 10000, 100000)):
+    # parse time and peak memory of the AST (traced separately, tracemalloc slows parsing down) for long programs
+    print('{0:16} {1:>12} {2:>14} {3:>14}'.format('statements', 'parse [s]', 'per stmt [us]', 'peak [MB]'))
+    cparser, parser, _ = cached_parser()
+    for n in sizes:
+        text = straight_line(n)
+        cparser.scanner.lexer.lineno = 1
+        start = time.perf_counter()
+        parser.parse(text, lexer=cparser.scanner)
+        elapsed = time.perf_counter() - start
+        cparser.scanner.lexer.lineno = 1
+        tracemalloc.start()
+        ast = parser.parse(text, lexer=cparser.scanner)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        del ast
+        print('{0:16} {1:12.3f} {2:14.2f} {3:14.1f}'.format(n, elapsed, elapsed / n * 1e6, peak / 2 ** 20))
+
+
+def bench_stream(sizes=(10000, 100000, 1000000)):
+    # lexing a program from a file read whole vs streamed in chunks: time and peak memory (traced separately)
+    print('{0:16} {1:>10} {2:>12} {3:>14}'.format('statements', 'input', 'lex [s]', 'peak [MB]'))
+    scanner = Scanner()
+    scanner.build()
+    modes = [('read', lambda file: scanner.input(file.read())), ('stream', scanner.input_stream)]
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'program.txt')
+        for n in sizes:
+            with open(filename, 'w') as file:
+                file.write(straight_line(n))
+            for mode, start_input in modes:
+                with open(filename) as file:
+                    scanner.lexer.lineno = 1
+                    start = time.perf_counter()
+                    start_input(file)
+                    lex_all(scanner)
+                    elapsed = time.perf_counter() - start
+                with open(filename) as file:
+                    scanner.lexer.lineno = 1
+                    tracemalloc.start()
+                    start_input(file)
+                    lex_all(scanner)
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                print('{0:16} {1:>10} {2:12.3f} {3:14.1f}'.format(n, mode, elapsed, peak / 2 ** 20))
+
+
+def bench_lexers(repeat=3, sizes=(10000, 100000)):
+    # tokens per second of ply.lex based Scanner and single regex FastScanner on long programs
+    print('{0:16} {1:>12} {2:>10} {3:>14} {4:>9}'.format('statements', 'lexer', 'tokens', 'tokens/s', 'speedup'))
+    for n in sizes:
+        text = straight_line(n) + FIB_ITER % n
+        baseline = None
+        for name, scanner in [('Scanner', Scanner()), ('FastScanner', FastScanner())]:
+            scanner.build()
+
+            def lex():
+                scanner.input(text)
+                return lex_all(scanner)
+            elapsed, _ = measure(lex, repeat)
+            count = lex()
+            baseline = baseline or elapsed
+            print('{0:16} {1:>12} {2:10} {3:14.0f} {4:8.1f}x'.format(n, name, count, count / elapsed, baseline / elapsed))
+
+
+def bench_program_cache(repeat=3, sizes=(1000, 10000, 100000)):
+    # lexing, parsing and type checking of a program vs loading it from the program cache
+    print('{0:16} {1:>12} {2:>12} {3:>9}'.format('statements', 'check [s]', 'cached [s]', 'speedup'))
+    cparser, parser, _ = cached_parser()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ProgramCache(cache_dir)
+        for n in sizes:
+            text = straight_line(n)
+
+            def check():
+                cparser.scanner.lexer.lineno = 1
+                return parser.parse(text, lexer=cparser.scanner).accept(TypeChecker())
+            elapsed, _ = measure(check, repeat)
+            cache.store(text, parser.parse(text, lexer=cparser.scanner))
+            cached, _ = measure(lambda: cache.load(text), repeat)
+            print('{0:16} {1:12.4f} {2:12.4f} {3:8.1f}x'.format(n, elapsed, cached, elapsed / cached))
+
+
+def bench_serialization(repeat=3):
+    # size and encode/decode time of parsed programs in the binary format of Serialization.py and pickled
+    print('{0:24} {1:>8} {2:>10} {3:>12} {4:>12}'.format('program', 'format', 'size [kB]', 'encode [ms]',
+                                                          'decode [ms]'))
+    programs = [('fib_iter', FIB_ITER % 3), ('200 functions', generated(200, 5)),
+                ('100000 statements', straight_line(100000))]
+    formats = [('pickle', lambda ast: pickle.dumps(ast, pickle.HIGHEST_PROTOCOL), pickle.loads),
+               ('binary', encode, decode)]
+    for name, text in programs:
+        ast = parse(text)
+        for format, dump, load in formats:
+            data = dump(ast)
+            encoding, _ = measure(lambda: dump(ast), repeat)
+            decoding, _ = measure(lambda: load(data), repeat)
+            print('{0:24} {1:>8} {2:10.1f} {3:12.2f} {4:12.2f}'.format(name, format, len(data) / 1024,
+                                                                      encoding * 1e3, decoding * 1e3))
+
+
+# backends: run time, calls, output and dispatch
+
+def bench_output(repeat=3, lines=100000):
+    # lines printed per second by a print loop with stdout redirected to a file, for every output sink
+    print('{0:12} {1:>12} {2:>12} {3:>14}'.format('sink', 'backend', 'time [s]', 'lines/s'))
+    ast = parse(PRINTS % lines)
+    sinks = [('print', lambda: None), ('buffered', BufferedSink), ('memory', MemorySink), ('null', NullSink)]
+    with tempfile.TemporaryFile('w') as file:
+        for name, sink in sinks:
+            for backend, run in [('interpreter', lambda: ast.accept(Interpreter(None, sink()))),
+                                 ('vm', lambda: VM(sink()).run(ast.accept(Compiler())))]:
+                best = None
+                for _ in range(repeat):
+                    file.seek(0)
+                    file.truncate()
+                    start = time.perf_counter()
+                    with contextlib.redirect_stdout(file):
+                        run()
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+                print('{0:12} {1:>12} {2:12.3f} {3:14.0f}'.format(name, backend, best, lines / best))
+
+
+def bench_backends(repeat=3):
+    print('{0:16} {1:>12} {2:>12} {3:>9}'.format('workload', 'backend', 'time [s]', 'speedup'))
+    for name, text in workloads:
+        ast = parse(text)
+        baseline = None
+        expected = None
+        for backend, run in backends:
+            elapsed, output = measure(lambda: run(ast), repeat)
+            if baseline is None:
+                baseline, expected = elapsed, output
+            elif output != expected:
+                raise AssertionError('{0} output differs from interpreter on {1}'.format(backend, name))
+            print('{0:16} {1:>12} {2:12.4f} {3:8.1f}x'.format(name, backend, elapsed, baseline / elapsed))
+
+
+def bench_native(repeat=3):
+    # tree-walking interpreter against the c backend on test programs: first run compiles the program,
+    # later ones take the executable from the cache; programs the C translation does not support fall back
+    print('{0:16} {1:>16} {2:>16} {3:>16} {4:>9}  {5}'.format('program', 'interpreter [s]', 'c, compile [s]',
+                                                            'c, cached [s]', 'speedup', 'fallback'))
+    directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tests')
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for name in ['fib.in', 'collatz.in', 'fact.in']:
+            with open(os.path.join(directory, name)) as file:
+                ast = parse(file.read())
+            elapsed, expected = measure(lambda: ast.accept(Interpreter()), repeat)
+            cache = NativeCache(cache_dir)
+            native = NativeInterpreter(cache=cache)
+            compiled, output = measure(lambda: ast.accept(native), 1)
+            cached, _ = measure(lambda: ast.accept(native), repeat)
+            if output != expected:
+                raise AssertionError('c output differs from interpreter on {0}'.format(name))
+            print('{0:16} {1:16.4f} {2:16.4f} {3:16.4f} {4:8.1f}x  {5}'.format(
+                name, elapsed, compiled, cached, elapsed / cached, native.fallback or '-'))
+
+
+def bench_depth(repeat=3, calls=2000):
+    # time per call of a recursive function reading a global at increasing recursion depth
+    print('{0:16} {1:>12} {2:>14}'.format('recursion depth', 'backend', 'per call [us]'))
+    for depth in [10, 50, 200]:
+        ast = parse(DEPTH % (calls // depth, depth))
+        for backend, run in backends:
+            elapsed, _ = measure(lambda: run(ast), repeat)
+            print('{0:16} {1:>12} {2:14.2f}'.format(depth, backend, elapsed / calls * 1e6))
+
+
+class ReturnValue(Exception):
+    def __init__(self, value):
+        self.value = value
+
+
+class ReturnInterpreter(Interpreter):
+    # Interpreter completing return with a ReturnValue exception raised through the enclosing statements, the way
+    # it did before completion signals (raising=True), or with signals behind the same overridden visit, so both
+    # pay for the extra call per node and differ only in how return completes
+    def __init__(self, raising):
+        super().__init__()
+        self.raising = raising
+
+    def visit(self, node, *args):
+        if self.raising and node.__class__ is AST.ReturnInstr and not node.tail:
+            raise ReturnValue(Interpreter.visit(self, node.expression))
+        return Interpreter.visit(self, node, *args)
+
+    def call(self, fun, frame):
+        try:
+            return Interpreter.call(self, fun, frame)
+        except ReturnValue as value:
+            return value.value
+
+
+def bench_calls(repeat=3, calls=20000):
+    # call-return overhead: loop calling a function returning its argument minus the same loop without the call;
+    # interpreter returning with signals and with exceptions for comparison
+    print('{0:16} {1:>12} {2:>14}'.format('call-return', 'backend', 'per call [us]'))
+    with_calls = parse(CALLS % calls)
+    without_calls = parse(NO_CALLS % calls)
+    returns = [('signals', lambda ast: ast.accept(ReturnInterpreter(False))),
+               ('exceptions', lambda ast: ast.accept(ReturnInterpreter(True)))]
+    for backend, run in backends + returns:
+        elapsed, _ = measure(lambda: run(with_calls), repeat)
+        loop, _ = measure(lambda: run(without_calls), repeat)
+        print('{0:16} {1:>12} {2:14.2f}'.format('f(i)', backend, (elapsed - loop) / calls * 1e6))
+
+
+class WhenVisitor(object):
+    @on('node')
+    def visit(self, node):
+        return None
+
+    @when(AST.Integer)
+    def visit(self, node):
+        return node
+
+    @when(AST.Node)
+    def visit(self, node):
+        return node
+
+
+class GetattrVisitor(NodeVisitor):
+    def visit_Integer(self, node):
+        return node
+
+    def visit_InitList(self, node):
+        return node
+
+
+def bench_dispatch(repeat=3, n=200000):
+    # cost of a single dispatch: @when on exact type and on a type resolved through its MRO
+    # (InitList -> Node), name-based getattr dispatch of NodeVisitor and a plain method call for reference
+    print('{0:24} {1:>14}'.format('dispatch', 'per node [ns]'))
+    integer, init_list = AST.Integer(1, 1), AST.InitList()
+    cases = [
+        ('@when exact', WhenVisitor().visit, integer),
+        ('@when via MRO', WhenVisitor().visit, init_list),
+        ('NodeVisitor getattr', GetattrVisitor().visit, integer),
+        ('direct method call', GetattrVisitor().visit_Integer, integer),
+    ]
+    for name, visit, node in cases:
+        nodes = [node] * n
+        elapsed, _ = measure(lambda: [visit(node) for node in nodes], repeat)
+        print('{0:24} {1:14.1f}'.format(name, elapsed / n * 1e9))
+
+
+# optimizations: folding, dead code, memoization, tail calls and explicit stacks
+
+class NodeCountingInterpreter(Interpreter):
+    # Interpreter counting evaluated nodes
+    def __init__(self):
+        super().__init__()
+        self.evaluations = 0
+
+    def visit(self, node, *args):
+        self.evaluations += 1
+        return Interpreter.visit(self, node, *args)
+
+
+def bench_optimize(repeat=3):
+    # node evaluations and run time of arithmetic heavy program before and after constant folding
+    print('{0:16} {1:>14} {2:>12}'.format('optimization', 'evaluations', 'time [s]'))
+    for optimize in [False, True]:
+        ast = parse(ARITH)
+        if optimize:
+            ast = ast.accept(OptimizationPass1())
+        interpreter = NodeCountingInterpreter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            ast.accept(interpreter)
+        elapsed, _ = measure(lambda: ast.accept(Interpreter()), repeat)
+        print('{0:16} {1:14} {2:12.4f}'.format('folded' if optimize else 'none', interpreter.evaluations, elapsed))
+
+
+def bench_dead_code(repeat=3, functions=200, called=5):
+    # size and run time of a generated program with unreachable code, write-only locals and unused functions
+    print('{0:16} {1:>10} {2:>12}'.format('dead code', 'nodes', 'time [s]'))
+    for optimize in [False, True]:
+        ast = parse(generated(functions, called))
+        if optimize:
+            ast = ast.accept(OptimizationPass2())
+        elapsed, _ = measure(lambda: ast.accept(Interpreter()), repeat)
+        print('{0:16} {1:10} {2:12.4f}'.format('removed' if optimize else 'none', count_nodes(ast), elapsed))
+
+
+def bench_memoize(repeat=3):
+    # interpreter on recursive workloads with and without memoized pure functions, outputs have to match
+    print('{0:16} {1:>12} {2:>12} {3:>16}'.format('memoization', 'plain [s]', 'memo [s]', 'hits / misses'))
+    for name, text in [('fib(20)', FIB % 20), ('trib(18)', TRIB % 18)]:
+        ast = parse(text)
+        plain, expected = measure(lambda: ast.accept(Interpreter()), repeat)
+        memoized, output = measure(lambda: ast.accept(Interpreter(1024)), repeat)
+        if output != expected:
+            raise AssertionError('memoized output differs on {0}'.format(name))
+        interpreter = Interpreter(1024)
+        with contextlib.redirect_stdout(io.StringIO()):
+            ast.accept(interpreter)
+        cache = next(iter(interpreter.memo.values()))
+        print('{0:16} {1:12.4f} {2:12.4f} {3:>16}'.format(name, plain, memoized,
+                                                           '{0} / {1}'.format(cache.hits, cache.misses)))
+
+
+def bench_tail_calls(repeat=3):
+    # interpreter time per call of a self-recursive function in tail position (run as a loop) and not
+    print('{0:16} {1:>12} {2:>14}'.format('recursion depth', 'call', 'per call [us]'))
+    for depth in [100, 1000, 10000, 100000]:
+        for name, text in [('tail', TAIL), ('non-tail', NON_TAIL)]:
+            ast = parse(text % depth)
+            try:
+                elapsed, _ = measure(lambda: ast.accept(Interpreter()), repeat)
+                result = '{0:14.2f}'.format(elapsed / depth * 1e6)
+            except RecursionError:
+                result = '{0:>14}'.format('RecursionError')
+            print('{0:16} {1:>12} {2}'.format(depth, name, result))
+
+
+def bench_nesting(repeat=3):
+    # evaluation of a single expression a+a+...+a of growing length by the recursive and the explicit stack
+    # interpreter, and of non-tail user recursion of growing depth
+    print('{0:24} {1:>12} {2:>14}'.format('nesting', 'backend', 'per node [us]'))
+    for terms in [100, 1000, 50000]:
+        ast = parse("int a = 1;\nprint " + "+".join(["a"] * terms) + ";\n")
+        for name, interpreter in [('interpreter', Interpreter), ('stack', StackInterpreter)]:
+            try:
+                elapsed, _ = measure(lambda: ast.accept(interpreter()), repeat)
+                result = '{0:14.3f}'.format(elapsed / (2 * terms) * 1e6)
+            except RecursionError:
+                result = '{0:>14}'.format('RecursionError')
+            print('{0:24} {1:>12} {2}'.format('{0} terms'.format(terms), name, result))
+    for depth in [100, 1000, 100000]:
+        ast = parse(NON_TAIL % depth)
+        for name, interpreter in [('interpreter', Interpreter), ('stack', StackInterpreter)]:
+            try:
+                elapsed, _ = measure(lambda: ast.accept(interpreter()), repeat)
+                result = '{0:14.3f}'.format(elapsed / depth * 1e6)
+            except RecursionError:
+                result = '{0:>14}'.format('RecursionError')
+            print('{0:24} {1:>12} {2}'.format('recursion depth {0}'.format(depth), name, result))
+
+
+if __name__ == '__main__':
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    bench_startup(repeat)
+    print()
+    bench_parse()
+    print()
+    bench_stream()
+    print()
+    bench_lexers(repeat)
+    print()
+    bench_program_cache(repeat)
+    print()
+    bench_serialization(repeat)
+    print()
+    bench_output(repeat)
+    print()
+    bench_backends(repeat)
+    print()
+    bench_native(repeat)
+    print()
+    bench_depth(repeat)
+    print()
+    bench_calls(repeat)
+    print()
+    bench_dispatch(repeat)
+    print()
+    bench_optimize(repeat)
+    print()
+    bench_dead_code(repeat)
+    print()
+    bench_memoize(repeat)
+    print()
+    bench_tail_calls(repeat)
+    print()
+    bench_nesting(repeat)
@@ -1,30 +1,246 @@
+import io
 import sys
+import argparse
+import contextlib
 import ply.yacc as yacc
 from Cparser import Cparser
+from FastScanner import FastScanner
 from TypeChecker import TypeChecker
 from Interpreter import Interpreter
+from Compiler import Compiler
+from VM import VM
+from ClosureCompiler import ClosureInterpreter
+from StackInterpreter import StackInterpreter
+from ParseTables import cached_parser
+from ProgramCache import ProgramCache
+from Profiler import ProfilingInterpreter
+from RunStats import RunStats, CountingScanner, CountingTypeChecker, CountingInterpreter
+from Output import BufferedSink, NullSink, FLUSH_SIZE
+from CodeGenerator import PythonInterpreter, CodeCache
+from CCodeGenerator import NativeInterpreter, NativeCache
+from OptimizationPass1 import OptimizationPass1
+from OptimizationPass2 import OptimizationPass2
+
+backends = ['interpreter', 'vm', 'closure', 'stack', 'python', 'c']
+
+
+def run(ast, backend='interpreter', memoize=None, profile=False, stacks=None, output=None, stats=None, store=None):
+    # executes type checked program <ast> with <backend>, <memoize> - LRU cache size for results of pure
+    # functions (interpreter only), their hit and miss counts are reported on stderr at exit;
+    # <profile> - report time per function and source line on stderr, <stacks> - file to write them to
+    # in collapsed stack format (interpreter only); <output> - sink of printed values (Output.py), None - print;
+    # <stats> - RunStats to add function calls and frames pushed to (interpreter only, unless profiling);
+    # <store> - function called with the python code compiled from the program, to cache it (python only)
+    if backend == 'vm':
+        VM(output).run(ast.accept(Compiler()))
+    elif backend == 'closure':
+        ast.accept(ClosureInterpreter(output))
+    elif backend == 'stack':
+        ast.accept(StackInterpreter(output))
+    elif backend == 'python':
+        ast.accept(PythonInterpreter(output, store))
+    elif backend == 'c':
+        ast.accept(NativeInterpreter(output, NativeCache()))
+    else:
+        # jesli wizytor TypeChecker z implementacji w poprzednim lab korzystal z funkcji accept
+        # to nazwa tej ostatniej dla Interpretera powinna zostac zmieniona, np. na accept2 ( ast.accept2(Interpreter()) )
+        # tak aby rozne funkcje accept z roznych implementacji wizytorow nie kolidowaly ze soba
+        if profile or stacks:
+            interpreter = ProfilingInterpreter(memoize, output)
+        elif stats is not None:
+            interpreter = CountingInterpreter(memoize, output)
+        else:
+            interpreter = Interpreter(memoize, output)
+        try:
+            ast.accept(interpreter)
+        finally:
+            if isinstance(interpreter, CountingInterpreter):
+                stats.counters['function calls'] = interpreter.calls
+                stats.counters['frames pushed'] = interpreter.frames
+            for line in interpreter.memo_report():
+                print(line, file=sys.stderr)
+            if profile:
+                for line in interpreter.report():
+                    print(line, file=sys.stderr)
+            if stacks:
+                with open(stacks, 'w') as file:
+                    for line in interpreter.collapsed_stacks():
+                        print(line, file=file)
+
+
+def frontend(parser, cparser, file, text=None, stats=None):
+    # program parsed from <text> (streamed from <file> if None) and whether it type checks; <stats> - RunStats
+    # to record phases and counters in, tokens are counted as the parser takes them (lexing is part of parsing)
+    phase = stats.phase if stats is not None else untimed
+    scanner = cparser.scanner if stats is None else CountingScanner(cparser.scanner)
+    with phase('parsing'):
+        if text is None:
+            scanner.input_stream(file)
+            ast = parser.parse(lexer=scanner)
+        else:
+            ast = parser.parse(text, lexer=scanner)
+    if stats is not None:
+        stats.counters['tokens'] = scanner.tokens
+    checker = TypeChecker() if stats is None else CountingTypeChecker()
+    with phase('type checking'):
+        valid = ast.accept(checker)
+    if stats is not None:
+        stats.counters['symbol table scopes'] = checker.scopes
+        stats.count_nodes(ast)
+    return ast, valid
+
+
+def untimed(name):  # stands in for RunStats.phase without --stats
+    return contextlib.nullcontext()
+
 
 if __name__ == '__main__':
 
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument('filename', nargs='?', default="example.txt")
+    argparser.add_argument('-b', '--backend', choices=backends, default='interpreter',
+                           help="execute program with tree-walking interpreter, compile it to bytecode for the VM "
+                                "or to nested python closures, evaluate the tree with explicit stacks, translate "
+                                "it to python source run by python itself, or to C compiled to a native executable")
+    argparser.add_argument('--dis', action='store_true', help="print compiled bytecode instead of running it")
+    argparser.add_argument('-O', '--optimize', action='store_true',
+                           help="fold constant expressions, simplify identities, prune if statements with "
+                                "constant conditions and remove dead code before execution")
+    argparser.add_argument('--report', action='store_true',
+                           help="list code removed by --optimize on stderr, implies --optimize")
+    argparser.add_argument('--memoize', action='store_true',
+                           help="cache results of pure functions, report cache hits and misses on stderr "
+                                "(interpreter backend only)")
+    argparser.add_argument('--memo-size', type=int, default=1024, help="entries kept in cache of each function")
+    argparser.add_argument('--cached-tables', action='store_true',
+                           help="load lexer and parser tables cached under a hash of the grammar instead of "
+                                "building and validating them (no parsetab.py/parser.out written)")
+    argparser.add_argument('--stream', action='store_true',
+                           help="lex the file in chunks as the parser consumes tokens instead of reading it whole")
+    argparser.add_argument('--fast-lexer', action='store_true',
+                           help="lex with FastScanner (single regex) instead of ply.lex")
+    argparser.add_argument('--ast-cache', action='store_true',
+                           help="reuse parsed and checked program cached on disk under a hash of the source, "
+                                "skipping lexing, parsing and type checking of an unchanged file")
+    argparser.add_argument('--cache-stats', action='store_true',
+                           help="print program cache statistics on stderr, implies --ast-cache")
+    argparser.add_argument('--output', choices=['print', 'buffered', 'null'], default='print',
+                           help="print every line of output as it is printed, collect it in a buffer written "
+                                "every --flush-size characters and at exit, or drop it")
+    argparser.add_argument('--flush-size', type=int, default=FLUSH_SIZE, help="size of buffered output")
+    argparser.add_argument('--profile', action='store_true',
+                           help="report calls and time of every function and executions and time of every source "
+                                "line on stderr (interpreter backend only)")
+    argparser.add_argument('--profile-stacks', metavar='FILE',
+                           help="write time spent in functions in collapsed stack format for flamegraph tools")
+    argparser.add_argument('--stats', action='store_true',
+                           help="report time and peak memory of every phase (parsing with lexing, type checking, "
+                                "interpretation) and counters of tokens, AST nodes, symbol table scopes, function "
+                                "calls and frames (the last two with the interpreter backend) on stderr")
+    argparser.add_argument('--trace-memory', action='store_true',
+                           help="--stats with memory allocated in every phase traced by tracemalloc instead of "
+                                "peak resident set size of the process, much slower")
+    args = argparser.parse_args()
+    if args.memoize and args.backend != 'interpreter':
+        argparser.error("--memoize works with the interpreter backend only")
+    if (args.profile or args.profile_stacks) and args.backend != 'interpreter':
+        argparser.error("--profile works with the interpreter backend only")
+    if args.cache_stats:
+        args.ast_cache = True
+    if args.ast_cache and args.stream:
+        argparser.error("--ast-cache (and --cache-stats) needs the whole source, it cannot be used with --stream")
+    if args.report:
+        args.optimize = True
+
     try:
-        filename = sys.argv[1] if len(sys.argv) > 1 else "example.txt"
+        filename = args.filename
         file = open(filename, "r")
     except IOError:
         print("Cannot open {0} file".format(filename))
         sys.exit(0)
 
-    Cparser = Cparser()
-    parser = yacc.yacc(module=Cparser)
-    text = file.read()
-
-    ast = parser.parse(text, lexer=Cparser.scanner)
-    if ast.accept(TypeChecker()):
-        # jesli wizytor TypeChecker z implementacji w poprzednim lab korzystal z funkcji accept
-        # to nazwa tej ostatniej dla Interpretera powinna zostac zmieniona, np. na accept2 ( ast.accept2(Interpreter()) )
-        # tak aby rozne funkcje accept z roznych implementacji wizytorow nie kolidowaly ze soba
-        ast.accept(Interpreter())
-
-    # in future
-    # ast.accept(OptimizationPass1())
-    # ast.accept(OptimizationPass2())
-    # ast.accept(CodeGenerator())
+    stats = RunStats(args.trace_memory) if args.stats or args.trace_memory else None
+    phase = stats.phase if stats is not None else untimed
+    text = None if args.stream else file.read()
+    cache = ProgramCache() if args.ast_cache else None
+    # python code compiled from the program is cached under its source text, a hit only runs it
+    code_cache = CodeCache() if args.backend == 'python' and text is not None and not (args.dis or args.report) \
+        else None
+    output = {'print': None, 'buffered': BufferedSink(flush_size=args.flush_size), 'null': NullSink()}[args.output]
+    compiled = None
+    if code_cache is not None:
+        with phase('cache lookup'):
+            compiled = code_cache.load(text, args.optimize)
+    entry = None
+    if cache is not None and compiled is None:
+        with phase('cache lookup'):
+            entry = cache.load(text)
+    messages = ''
+    if compiled is not None:
+        code, messages = compiled
+        sys.stdout.write(messages)
+        valid = True
+    elif entry is not None:
+        ast, messages = entry
+        sys.stdout.write(messages)
+        valid = True
+        if stats is not None:
+            stats.count_nodes(ast)
+    else:
+        with phase('parser construction'):
+            if args.cached_tables:
+                Cparser, parser, _ = cached_parser()
+            else:
+                Cparser = Cparser()
+                parser = yacc.yacc(module=Cparser)
+            if args.fast_lexer:
+                Cparser.scanner = FastScanner()
+                Cparser.scanner.build()
+        if cache is not None or code_cache is not None:
+            # messages printed while checking are stored with the program to be printed again on a hit
+            buffer = io.StringIO()
+            try:
+                with contextlib.redirect_stdout(buffer):
+                    ast, valid = frontend(parser, Cparser, file, text, stats)
+            finally:
+                messages = buffer.getvalue()
+                sys.stdout.write(messages)
+            if valid and cache is not None:
+                cache.store(text, ast, messages)
+        else:
+            ast, valid = frontend(parser, Cparser, file, text, stats)
+    if args.cache_stats:
+        for used in (cache, code_cache):
+            if used is not None:
+                for line in used.report():
+                    print(line, file=sys.stderr)
+    try:
+        if valid and compiled is not None:
+            with phase('interpretation'):
+                PythonInterpreter(output).execute(code)
+        elif valid:
+            if args.optimize:
+                with phase('optimization'):
+                    ast = ast.accept(OptimizationPass1())
+                    dead_code = OptimizationPass2()
+                    ast = ast.accept(dead_code)
+                if args.report:
+                    for line in dead_code.report():
+                        print(line, file=sys.stderr)
+            if args.dis:
+                print(ast.accept(Compiler()).dis())
+            else:
+                store = None
+                if code_cache is not None:
+                    def store(code):
+                        code_cache.store(text, args.optimize, code, messages)
+                with phase('interpretation'):
+                    run(ast, args.backend, args.memo_size if args.memoize else None, args.profile,
+                        args.profile_stacks, output, stats, store)
+    finally:
+        for used in (cache, code_cache):
+            if used is not None:
+                used.save_totals()
+        if stats is not None:
+            for line in stats.report():
+                print(line, file=sys.stderr)
@@ -1,21 +1,102 @@
 import ply.lex as lex
+from array import array
+
+# characters read from a stream at once
+CHUNK_SIZE = 1 << 16
 
 
 class Scanner(object):
-    def find_tok_column(self, token):
-        last_cr = self.lexer.lexdata.rfind('\n', 0, token.lexpos)
-        if last_cr < 0:
-            last_cr = 0
-        return token.lexpos - last_cr
+    # text given to the lexer is either the whole input or, in streaming mode, a piece of the stream ending
+    # at a newline, as no token but a block comment spans lines; token positions are absolute in both modes
 
-    def build(self):
-        self.lexer = lex.lex(object=self)
+    stream = None
+
+    def find_tok_column(self, token):
+        # column from index of line starts of the current piece, built on first use: O(1) per lookup
+        # (first line keeps the historical 0-based column)
+        if self.line_starts is None:
+            self.index_lines()
+        start = self.line_starts[int(token.lineno) - self.first_line]
+        return token.lexpos - (start - 1 if start > 0 else 0)
+
+    def index_lines(self):
+        data = self.lexer.lexdata
+        starts = array('q', [self.first_line_start])
+        pos = data.find('\n')
+        while pos >= 0:
+            starts.append(self.base + pos + 1)
+            pos = data.find('\n', pos + 1)
+        self.line_starts = starts
+
+    def build(self, **kwargs):  # kwargs are passed to ply.lex.lex, e.g. optimize and lextab
+        self.lexer = lex.lex(object=self, **kwargs)
 
     def input(self, text):
+        self.stream = None
+        self.start_piece(text, 0, self.lexer.lineno, 0)
+
+    def input_stream(self, stream, chunk_size=CHUNK_SIZE):
+        # lexes text read from file object <stream> in chunks, the parser gets tokens as they are read
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.pending = ''  # text read from the stream, not given to the lexer yet
+        self.eof = False
+        self.start_piece('', 0, self.lexer.lineno, 0)
+
+    def start_piece(self, text, base, first_line, first_line_start):
+        # <text> starts at offset <base> of the input, in line <first_line> starting at <first_line_start>
+        self.base = base
+        self.first_line = int(first_line)
+        self.first_line_start = first_line_start
+        self.line_starts = None
         self.lexer.input(text)
 
+    def refill(self, start=None):
+        # next piece of the stream: rest of current piece from <start> (None - nothing left) and enough new text
+        # to reach a newline, and a closing */ too when restarting at an unterminated block comment
+        data = self.lexer.lexdata
+        if start is None:
+            start = len(data)
+            text = self.pending
+            line_start = self.base + start
+            need = 0
+        else:
+            text = data[start:] + self.pending
+            newline = data.rfind('\n', 0, start)
+            line_start = self.base + newline + 1 if newline >= 0 else self.first_line_start
+            need = -1
+        while not self.eof:
+            if need < 0:
+                end = text.find('*/', 2)
+                need = end + 2 if end >= 0 else -1
+            if need >= 0 and text.find('\n', need) >= 0:
+                break
+            chunk = self.stream.read(self.chunk_size)
+            if not chunk:
+                self.eof = True
+            text += chunk
+        cut = len(text) if self.eof else text.rfind('\n') + 1
+        self.pending = text[cut:]
+        if not cut:
+            return False
+        self.start_piece(text[:cut], self.base + start, self.lexer.lineno, line_start)
+        return True
+
     def token(self):
-        return self.lexer.token()
+        tok = self.lexer.token()
+        if self.stream is None:
+            return tok
+        while True:
+            if tok is None:
+                if not self.refill():
+                    return None
+            elif tok.type == '/' and not self.eof and self.lexer.lexdata.startswith('*', tok.lexpos + 1):
+                # /* not closed within the piece, lexed again once the stream is read up to its */
+                self.refill(tok.lexpos)
+            else:
+                tok.lexpos += self.base
+                return tok
+            tok = self.lexer.token()
 
     literals = "{}()<>=;:,+-*/%&|^"
 
@@ -21,31 +21,58 @@ def when(param_type):
     if not isinstance(dispatcher, Dispatcher):
       dispatcher = dispatcher.dispatcher
     dispatcher.add_target(param_type, fn)
-    def ff(*args, **kw):
-      return dispatcher(*args, **kw)
+    ff = dispatcher.function()
     ff.dispatcher = dispatcher
     return ff
   return f
 
 
 class Dispatcher(object):
+  # picks target registered for the nearest class in the MRO of the dispatched argument,
+  # the choice is memoized per concrete class; types without any target go to the @on decorated function
+
   def __init__(self, param_name, fn):
-    frame = inspect.currentframe().f_back.f_back   # these 2 lines
-    top_level = frame.f_locals == frame.f_globals  # seem redundant
-    self.param_index = inspect.getargspec(fn).args.index(param_name)
+    self.param_index = list(inspect.signature(fn).parameters).index(param_name)
     self.param_name = param_name
+    self.default = fn
     self.targets = {}
+    self.cache = {}
 
   def __call__(self, *args, **kw):
     typ = args[self.param_index].__class__
-    d = self.targets.get(typ)
-    if d is not None:
-      return d(*args, **kw)
+    d = self.cache.get(typ)
+    if d is None:
+      d = self.resolve(typ)
+    return d(*args, **kw)
+
+  def resolve(self, typ):
+    for klass in typ.__mro__:
+      d = self.targets.get(klass)
+      if d is not None:
+        break
     else:
-      issub = issubclass
-      t = self.targets
-      ks = t.keys()
-      return [ t[k](*args, **kw) for k in ks if issub(typ, k) ]
+      d = self.default
+    self.cache[typ] = d
+    return d
 
   def add_target(self, typ, target):
-    self.targets[typ] = target
\ No newline at end of file
+    self.targets[typ] = target
+    self.cache.clear()
+
+  def function(self):
+    # plain function doing the dispatch inline, so it binds as a method and costs a single call
+    dispatcher = self
+    cache = self.cache
+    resolve = self.resolve
+    if self.param_index == 1:
+      def ff(visitor, node, *args, **kw):
+        d = cache.get(node.__class__)
+        if d is None:
+          d = resolve(node.__class__)
+        if args or kw:
+          return d(visitor, node, *args, **kw)
+        return d(visitor, node)
+    else:
+      def ff(*args, **kw):
+        return dispatcher(*args, **kw)
+    return ff